@@ -1,23 +1,43 @@
+import argparse
 import os
 import re
 import io
-import csv
-from datetime import datetime, timedelta
-from difflib import get_close_matches
-
-from flask import Flask, render_template, request
-from PyPDF2 import PdfReader, PdfWriter
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-
-import pytesseract
-from pdf2image import convert_from_path
+import json
+import logging
+import sys
+import time
+from datetime import date, datetime
+
+from flask import (
+    Flask, Response, abort, redirect, render_template, request, send_file,
+    url_for,
+)
+from app.config import env_int
+from app.dates import format_mdy, row_date
+from app.jobs import JobQueue, QueueFull
+from app.logs import configure_logging
+from app.manifest import RunManifest, optional_hash
+from app.metrics import CONTENT_TYPE, METRICS, inc, timer
+from app.ocr import (DEFAULT_RASTER, OcrEngine, default_raster, default_strategy,
+                     default_workers, raster_label)
+from app.ocr_cache import OcrCache, file_hash
+from app.pipeline import DEFAULT_DEPTH, staged
+from app.rates import load_rate_directory
+from app.ship_index import ShipIndex
+from app.ship_registry import get_registry
+from app.textnorm import normalize, normalize_all, strip_times
 
 # ------------------------------------------------
 # FLASK APP
 # ------------------------------------------------
 app = Flask(__name__)
 
+configure_logging()
+logger = logging.getLogger("seapay.batch")
+
+# Per-page / per-form lines of a run: kept in the job log, DEBUG on stdout
+DETAIL_TAGS = ("[PAGE]", "[PDF]", "[OCR] Reading")
+
 # ------------------------------------------------
 # DEFAULT PATHS INSIDE CONTAINER
 # (You can override these in the Web GUI)
@@ -31,59 +51,39 @@ DEFAULT_OUTPUT_DIR = "/output"
 FONT_NAME = "Times-Roman"
 FONT_SIZE = 10
 
-# Tesseract binary (inside the container it will be in PATH)
-pytesseract.pytesseract.tesseract_cmd = "tesseract"
+# Only reprocess new or changed inputs (INCREMENTAL=0 forces full rebuilds)
+INCREMENTAL = os.environ.get("INCREMENTAL", "1") != "0"
+
+# Background batch runner (JOB_WORKERS / JOB_QUEUE_LIMIT env vars)
+JOBS = JobQueue()
+
+# OCR worker processes (OCR_WORKERS env var, defaults to every core)
+OCR_WORKERS = default_workers()
+
+# Page strategy (OCR_STRATEGY env var): auto = text layer first, then OCR
+OCR_STRATEGY = default_strategy()
+
+# Scan rendering (OCR_DPI / OCR_COLOR / OCR_REGION env vars)
+OCR_RASTER = default_raster()
+
+# Files read/parsed ahead of PDF generation (PIPELINE_DEPTH env var)
+PIPELINE_DEPTH = env_int("PIPELINE_DEPTH", DEFAULT_DEPTH)
 
 
 # ------------------------------------------------
-# SHIP LIST  (same as your working script)
+# SHIP LIST  (shared registry: app/data/ships.json)
 # ------------------------------------------------
-SHIP_LIST = [
-    "America","Anchorage","Arleigh Burke","Arlington","Ashland","Augusta",
-    "Bainbridge","Barry","Bataan","Beloit","Benfold","Billings","Blue Ridge",
-    "Boxer","Bulkeley","Canberra","Cape St. George","Carl M. Levin","Carney",
-    "Carter Hall","Chafee","Charleston","Chief","Chosin","Chung-Hoon",
-    "Cincinnati","Cole","Comstock","Cooperstown","Curtis Wilbur",
-    "Daniel Inouye","Decatur","Delbert D. Black","Dewey","Donald Cook","Essex",
-    "Farragut","Fitzgerald","Forrest Sherman","Fort Lauderdale","Fort Worth",
-    "Frank E. Petersen Jr.","Gabrielle Giffords","Germantown","Gettysburg",
-    "Gonzalez","Gravely","Green Bay","Gridley","Gunston Hall","Halsey",
-    "Harpers Ferry","Higgins","Hopper","Howard","Indianapolis","Iwo Jima",
-    "Jackson","Jack H. Lucas","James E. Williams","Jason Dunham",
-    "John Basilone","John Finn","John P. Murtha","John Paul Jones",
-    "John S. McCain","Kansas City","Kearsarge","Kidd","Kingsville",
-    "Laboon","Lake Erie","Lassen","Lenah Sutcliffe Higbee",
-    "Mahan","Makin Island","Manchester","Marinette","Mason","McCampbell",
-    "McFaul","Mesa Verde","Michael Monsoor","Michael Murphy","Milius",
-    "Minneapolis-Saint Paul","Mitscher","Mobile","Momsen","Montgomery",
-    "Mount Whitney","Mustin","Nantucket","New Orleans","New York","Nitze",
-    "O'Kane","Oak Hill","Oakland","Omaha","Oscar Austin","Patriot",
-    "Paul Hamilton","Paul Ignatius","Pearl Harbor","Pinckney","Pioneer",
-    "Porter","Portland","Preble","Princeton","Rafael Peralta","Ralph Johnson",
-    "Ramage","Richard M. McCool Jr.","Robert Smalls","Roosevelt","Ross",
-    "Rushmore","Russell","Sampson","San Antonio","San Diego","Santa Barbara",
-    "Savannah","Shiloh","Shoup","Somerset","Spruance","St. Louis","Sterett",
-    "Stethem","Stockdale","Stout","The Sullivans","Tortuga","Tripoli",
-    "Truxtun","Tulsa","Warrior","Wasp","Wayne E. Meyer",
-    "William P. Lawrence","Winston S. Churchill","Wichita","Zumwalt"
-]
-
-def normalize(text: str) -> str:
-    text = re.sub(r"\(.*?\)", "", text)
-    text = re.sub(r"[^A-Z ]", "", text.upper())
-    return " ".join(text.split())
-
-NORMALIZED_SHIPS = {normalize(s): s.upper() for s in SHIP_LIST}
+SHIP_REGISTRY = get_registry()
+SHIP_LIST = SHIP_REGISTRY.names
+
+NORMALIZED_SHIPS = SHIP_REGISTRY.normalized
 NORMAL_KEYS = list(NORMALIZED_SHIPS.keys())
+SHIP_INDEX = ShipIndex(NORMALIZED_SHIPS, cutoff=0.75)
 
 
 # ------------------------------------------------
 # CORE HELPERS (no filesystem in here)
 # ------------------------------------------------
-def strip_times(text: str) -> str:
-    return re.sub(r"\b[0-2]?\d[0-5]\d\b", "", text)
-
-
 def extract_member_name(text: str) -> str:
     m = re.search(r"NAME:\s*([A-Z\s]+?)\s+SSN", text)
     if not m:
@@ -92,18 +92,13 @@ def extract_member_name(text: str) -> str:
 
 
 def match_ship(raw_text: str):
-    candidate = normalize(raw_text)
+    return match_normalized(normalize(raw_text))
+
+
+def match_normalized(candidate: str):
     if not candidate:
         return None
-
-    words = candidate.split()
-    for size in range(len(words), 0, -1):
-        for i in range(len(words) - size + 1):
-            chunk = " ".join(words[i:i+size])
-            match = get_close_matches(chunk, NORMAL_KEYS, n=1, cutoff=0.75)
-            if match:
-                return NORMALIZED_SHIPS[match[0]]
-    return None
+    return SHIP_INDEX.match(candidate)
 
 
 def extract_year_from_filename(path: str) -> str:
@@ -111,141 +106,120 @@ def extract_year_from_filename(path: str) -> str:
     return m.group(1) if m else str(datetime.now().year)
 
 
+DATE_PREFIX = re.compile(r"\s*(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?")
+
+
 def parse_rows(text: str, year: str):
     rows = []
     seen = set()
     lines = text.splitlines()
 
-    for i, line in enumerate(lines):
-        m = re.match(r"\s*(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?", line)
-        if not m:
-            continue
+    with timer("row_parse"):
+        dated = []
+        for i, line in enumerate(lines):
+            m = DATE_PREFIX.match(line)
+            if not m:
+                continue
 
-        mm, dd, yy = m.groups()
-        y = ("20" + yy) if (yy and len(yy) == 2) else (yy if yy else year)
-        date = f"{mm.zfill(2)}/{dd.zfill(2)}/{y}"
+            day = row_date(*m.groups(), year)
+            if day is None:
+                continue
+
+            raw = line[m.end():]
+            if i + 1 < len(lines):
+                raw += " " + lines[i + 1]
+            dated.append((day, raw))
 
-        raw = line[m.end():]
-        if i + 1 < len(lines):
-            raw += " " + lines[i + 1]
+        # Normalize every candidate on the page in one pass
+        candidates = normalize_all([raw for _, raw in dated])
+    inc("rows", len(dated))
 
-        ship = match_ship(raw)
-        if not ship:
-            continue
+    with timer("ship_match"):
+        for (day, _), candidate in zip(dated, candidates):
+            ship = match_normalized(candidate)
+            if not ship:
+                continue
 
-        key = (date, ship)
-        if key not in seen:
-            rows.append({"date": date, "ship": ship})
-            seen.add(key)
+            key = (day, ship)
+            if key not in seen:
+                rows.append({"date": day, "ship": ship})
+                seen.add(key)
 
     return rows
 
 
 def group_by_ship(rows):
+    """Consecutive-day periods per ship; start and end are dates."""
     groups = {}
     for r in rows:
-        dt = datetime.strptime(r["date"], "%m/%d/%Y")
-        groups.setdefault(r["ship"], []).append(dt)
+        groups.setdefault(r["ship"], set()).add(r["date"].toordinal())
 
     results = []
-    for ship, dates in groups.items():
-        dates = sorted(set(dates))
+    for ship, days in groups.items():
+        days = sorted(days)
 
-        start = prev = dates[0]
-        for day in dates[1:]:
-            if day == prev + timedelta(days=1):
+        start = prev = days[0]
+        for day in days[1:]:
+            if day == prev + 1:
                 prev = day
             else:
                 results.append({
                     "ship": ship,
-                    "start": start.strftime("%m/%d/%Y"),
-                    "end": prev.strftime("%m/%d/%Y")
+                    "start": date.fromordinal(start),
+                    "end": date.fromordinal(prev)
                 })
                 start = prev = day
 
         results.append({
             "ship": ship,
-            "start": start.strftime("%m/%d/%Y"),
-            "end": prev.strftime("%m/%d/%Y")
+            "start": date.fromordinal(start),
+            "end": date.fromordinal(prev)
         })
 
     return results
 
 
 def load_rates(rate_file: str, log):
-    rates = {}
-
-    if not os.path.exists(rate_file):
-        log(f"[RATES] CSV not found: {rate_file}")
-        return rates
-
-    log(f"[RATES] Loading from {rate_file}")
-
-    with open(rate_file, "r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.DictReader(f)
-        if not reader.fieldnames:
-            log("[RATES] No header row detected.")
-            return rates
-
-        def _clean_header(h: str) -> str:
-            if h is None:
-                return ""
-            return h.lstrip("\ufeff").strip().strip('"').lower()
-
-        reader.fieldnames = [_clean_header(h) for h in reader.fieldnames]
-
-        for raw_row in reader:
-            row = {}
-            for k, v in raw_row.items():
-                key = _clean_header(k)
-                if not key:
-                    continue
-                row[key] = (v or "").strip()
+    return load_rate_directory(rate_file, log)
 
-            last = row.get("last", "").upper()
-            first = row.get("first", "").upper()
-            rate = row.get("rate", "").upper()
 
-            if not last or not rate:
-                continue
+def get_rate(name: str, rates) -> str:
+    return rates.lookup(name)
 
-            rates[f"{last},{first}"] = rate
 
-    log(f"[RATES] Loaded {len(rates)} entries.")
-    return rates
+def ocr_pdf(path: str, log, engine=None, progress=None) -> str:
+    log(f"[OCR] Reading {path}")
+    if engine is None:
+        with OcrEngine(workers=OCR_WORKERS, strategy=OCR_STRATEGY,
+                       raster=OCR_RASTER) as engine:
+            pages = engine.read_pdf(path)
+    else:
+        pages = engine.read_pdf(path)
 
+    for p in pages:
+        source = "text layer" if p.source == "text" else "OCR"
+        log(f"[PAGE] {p.page}: {source}")
 
-def get_rate(name: str, rates: dict) -> str:
-    parts = normalize(name).split()
-    if len(parts) < 2:
-        return ""
+    if progress:
+        progress("pages", len(pages))
 
-    first = parts[0]
-    last = parts[-1]
+    return "".join(p.text for p in pages).upper()
 
-    key = f"{last},{first}"
-    if key in rates:
-        return rates[key]
 
-    for k in rates:
-        if k.startswith(last + ","):
-            return rates[k]
+# Overlay-only PDFs kept next to the outputs, so the master packet can be
+# stamped from them instead of re-reading every finished form
+OVERLAY_DIR = ".overlays"
+PACKET_NAME = "MASTER_SEA_PAY_PACKET.pdf"
 
-    return ""
 
-
-def ocr_pdf(path: str, log) -> str:
-    log(f"[OCR] Reading {path}")
-    images = convert_from_path(path)  # poppler-utils is installed in container
-    out = ""
-    for img in images:
-        out += pytesseract.image_to_string(img)
-    return out.upper()
+def overlay_path(output_dir: str, filename: str) -> str:
+    return os.path.join(output_dir, OVERLAY_DIR, filename)
 
 
-def make_pdf(group, name, rate, template_pdf: str, output_dir: str, log):
-    start = group["start"]
-    end = group["end"]
+def make_pdf(group, name, rate, template_pdf: str, output_dir: str, log,
+             overlays=None):
+    start = format_mdy(group["start"])
+    end = format_mdy(group["end"])
     ship = group["ship"]
 
     parts = name.split()
@@ -258,76 +232,88 @@ def make_pdf(group, name, rate, template_pdf: str, output_dir: str, log):
 
     path = os.path.join(output_dir, filename)
 
-    buf = io.BytesIO()
-    c = canvas.Canvas(buf, pagesize=letter)
-    c.setFont(FONT_NAME, FONT_SIZE)
-
-    # ---------------- HEADER ----------------
-    c.setFont(FONT_NAME, 10)
-    c.drawString(39, 689, "AFLOAT TRAINING GROUP SAN DIEGO (UIC. 49365)")
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from app.pdf_template import load_template
 
-    # CHECKBOX
-    c.drawString(373, 671, "X")
+    with timer("overlay_render"):
+        buf = io.BytesIO()
+        c = canvas.Canvas(buf, pagesize=letter)
+        c.setFont(FONT_NAME, FONT_SIZE)
 
-    # ENTITLEMENT
-    c.setFont(FONT_NAME, 8)
-    c.drawString(39, 650, "ENTITLEMENT")
+        # ---------------- HEADER ----------------
+        c.setFont(FONT_NAME, 10)
+        c.drawString(39, 689, "AFLOAT TRAINING GROUP SAN DIEGO (UIC. 49365)")
 
-    # OPNAV INST
-    c.drawString(345, 641, "OPNAVINST 7220.14")
+        # CHECKBOX
+        c.drawString(373, 671, "X")
 
-    # Back to normal font size
-    c.setFont(FONT_NAME, FONT_SIZE)
+        # ENTITLEMENT
+        c.setFont(FONT_NAME, 8)
+        c.drawString(39, 650, "ENTITLEMENT")
 
-    # NAME WITH RATE
-    if rate:
-        c.drawString(39, 41, f"{rate} {last}, {first}")
-    else:
-        c.drawString(39, 41, f"{last}, {first}")
-
-    # REPORT CAREER LINE
-    c.drawString(38.84, 595, f"____. REPORT CAREER SEA PAY FROM {start} TO {end}.")
+        # OPNAV INST
+        c.drawString(345, 641, "OPNAVINST 7220.14")
 
-    # MEMBER LINE
-    c.drawString(64, 571, f"Member performed eight continuous hours per day on-board: {ship} Category A vessel.")
+        # Back to normal font size
+        c.setFont(FONT_NAME, FONT_SIZE)
 
-    # CERTIFYING OFFICIAL BLOCK
-    c.setFont(FONT_NAME, 10)
-    c.drawString(356.26, 499.5, "_________________________")
-    c.drawString(363.8, 487.5, "Certifying Official & Date")
-    c.drawString(356.26, 427.5, "_________________________")
-    c.drawString(384.1, 415.2, "FI MI Last Name")
+        # NAME WITH RATE
+        if rate:
+            c.drawString(39, 41, f"{rate} {last}, {first}")
+        else:
+            c.drawString(39, 41, f"{last}, {first}")
 
-    # SEA PAY CERTIFIER LABEL
-    c.drawString(38.8, 83, "SEA PAY CERTIFIER")
+        # REPORT CAREER LINE
+        c.drawString(38.84, 595, f"____. REPORT CAREER SEA PAY FROM {start} TO {end}.")
 
-    # USN AD LABEL
-    c.drawString(503.5, 41, "USN AD")
+        # MEMBER LINE
+        c.drawString(64, 571, f"Member performed eight continuous hours per day on-board: {ship} Category A vessel.")
 
-    c.save()
-    buf.seek(0)
+        # CERTIFYING OFFICIAL BLOCK
+        c.setFont(FONT_NAME, 10)
+        c.drawString(356.26, 499.5, "_________________________")
+        c.drawString(363.8, 487.5, "Certifying Official & Date")
+        c.drawString(356.26, 427.5, "_________________________")
+        c.drawString(384.1, 415.2, "FI MI Last Name")
 
-    overlay = PdfReader(buf)
-    template = PdfReader(template_pdf)
+        # SEA PAY CERTIFIER LABEL
+        c.drawString(38.8, 83, "SEA PAY CERTIFIER")
 
-    base = template.pages[0]
-    base.merge_page(overlay.pages[0])
+        # USN AD LABEL
+        c.drawString(503.5, 41, "USN AD")
 
-    writer = PdfWriter()
-    writer.add_page(base)
+        c.save()
+        overlay = buf.getvalue()
 
-    for i in range(1, len(template.pages)):
-        writer.add_page(template.pages[i])
+    with timer("template_merge"):
+        template = load_template(template_pdf)
+        data = template.render(overlay, extra_pages=True)
+    inc("pdfs")
 
-    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(os.path.join(output_dir, OVERLAY_DIR), exist_ok=True)
     with open(path, "wb") as f:
-        writer.write(f)
+        f.write(data)
+    with open(overlay_path(output_dir, filename), "wb") as f:
+        f.write(overlay)
+    if overlays is not None:
+        overlays[filename] = overlay
 
     log(f"[PDF] Created {path}")
     return path
 
 
-def merge_with_bookmarks(output_dir: str, log):
+def merge_with_bookmarks(output_dir: str, log, template_pdf: str = None,
+                         overlays=None):
+    """
+    Build the master packet, one bookmark per form.
+
+    With the template, every form that has a saved overlay (from overlays,
+    this run's in-memory dict, or the .overlays dir) is stamped straight
+    into the packet, so all pages share a single copy of the template's
+    fonts and content streams. Forms without one are copied page by page
+    from their PDF as before.
+    """
     pdfs = sorted(
         f for f in os.listdir(output_dir)
         if f.lower().endswith(".pdf") and not f.startswith("MASTER")
@@ -337,30 +323,91 @@ def merge_with_bookmarks(output_dir: str, log):
         log("[MERGE] No PDFs to merge.")
         return None
 
-    writer = PdfWriter()
-    page = 0
-    for file in pdfs:
-        full = os.path.join(output_dir, file)
-        reader = PdfReader(full)
-        writer.add_outline_item(file.replace(".pdf", ""), page)
-        for p in reader.pages:
-            writer.add_page(p)
-            page += 1
-
-    out_path = os.path.join(output_dir, "MASTER_SEA_PAY_PACKET.pdf")
-    with open(out_path, "wb") as f:
-        writer.write(f)
-
-    log(f"[MERGE] Master packet created: {out_path}")
+    from PyPDF2 import PdfReader, PdfWriter
+    from app.pdf_template import load_template
+
+    template = None
+    if template_pdf and os.path.exists(template_pdf):
+        template = load_template(template_pdf)
+    overlays = overlays or {}
+
+    with timer("master_merge"):
+        writer = PdfWriter()
+        stamped = 0
+        for file in pdfs:
+            page = len(writer.pages)
+            overlay = overlays.get(file)
+            if overlay is None and template is not None:
+                try:
+                    with open(overlay_path(output_dir, file), "rb") as f:
+                        overlay = f.read()
+                except OSError:
+                    pass
+
+            if template is not None and overlay is not None:
+                template.stamp(writer, overlay, extra_pages=True)
+                stamped += 1
+            else:
+                for p in PdfReader(os.path.join(output_dir, file)).pages:
+                    writer.add_page(p)
+            writer.add_outline_item(file.replace(".pdf", ""), page)
+
+        out_path = os.path.join(output_dir, PACKET_NAME)
+        with open(out_path, "wb") as f:
+            writer.write(f)
+
+    _prune_overlays(output_dir, set(pdfs))
+    log(f"[MERGE] Master packet created: {out_path} "
+        f"({len(pdfs)} forms, {stamped} from overlays)")
     return out_path
 
 
-def run_processor(data_dir, template_pdf, rate_file, output_dir):
-    logs = []
+def _prune_overlays(output_dir: str, keep):
+    """Drop saved overlays whose form is gone."""
+    folder = os.path.join(output_dir, OVERLAY_DIR)
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return
+    for name in names:
+        if name not in keep:
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+
+def run_processor(data_dir, template_pdf, rate_file, output_dir, workers=None,
+                  logs=None, progress=None, incremental=INCREMENTAL,
+                  depth=PIPELINE_DEPTH, log_line=None):
+    """
+    Process every input PDF in data_dir and build the master packet.
+
+    logs, if given, is appended to as the run goes, and log_line(msg) is
+    called for every line (so a caller can watch it live); progress(key, n)
+    is called as files, pages and PDFs finish and for every error or
+    warning logged.
+    With incremental, inputs whose content, rate CSV and template are
+    unchanged since the last run (per the output dir's manifest) are
+    skipped, and the packet is only rebuilt when the outputs changed.
+    """
+    logs = [] if logs is None else logs
+    progress = progress or (lambda key, n=1: None)
 
     def log(msg):
-        print(msg)
         logs.append(msg)
+        if log_line is not None:
+            log_line(msg)
+        if msg.startswith(DETAIL_TAGS):
+            logger.debug("%s", msg)
+        elif msg.startswith("[ERROR]"):
+            logger.error("%s", msg)
+            progress("errors")
+        elif msg.startswith("[WARN]"):
+            logger.warning("%s", msg)
+            progress("warnings")
+        else:
+            logger.info("%s", msg)
 
     log(f"[CONFIG] DATA       = {data_dir}")
     log(f"[CONFIG] TEMPLATE   = {template_pdf}")
@@ -382,34 +429,146 @@ def run_processor(data_dir, template_pdf, rate_file, output_dir):
         log("[PROCESS] No input PDFs found.")
         return logs
 
-    for file in files:
-        path = os.path.join(data_dir, file)
-        log(f"[PROCESS] ---- {file} ----")
+    manifest = None
+    digests = {}
+    removed = []
+    if incremental:
+        settings = {
+            "rates": optional_hash(rate_file),
+            "template": optional_hash(template_pdf),
+            "strategy": OCR_STRATEGY,
+        }
+        if OCR_RASTER != DEFAULT_RASTER:
+            settings["raster"] = raster_label(OCR_RASTER)
+        manifest = RunManifest(output_dir, settings)
+        if manifest.removed:
+            log(f"[INCREMENTAL] Settings changed, removed {len(manifest.removed)} "
+                f"output(s) of the previous run")
+        pruned = manifest.prune(set(files))
+        for name in pruned:
+            log(f"[INCREMENTAL] Removed stale {name}")
+        removed = manifest.removed + pruned
+
+        digests = {f: file_hash(os.path.join(data_dir, f)) for f in files}
+        changed = [f for f in files if not manifest.unchanged(f, digests[f])]
+        progress("unchanged", len(files) - len(changed))
+        log(f"[INCREMENTAL] {len(files) - len(changed)} unchanged, "
+            f"{len(changed)} new or changed")
+        files = changed
+
+    progress("files_total", len(files))
+
+    packet = os.path.join(output_dir, PACKET_NAME)
+    if manifest is not None and not files and not removed \
+            and manifest.packet_current(packet):
+        manifest.save()
+        log("[MERGE] Master packet is up to date.")
+        log("✅ ALL FILES COMPLETE")
+        return logs
+
+    workers = workers or OCR_WORKERS
+    log(f"[OCR] Using {workers} worker process(es), strategy={OCR_STRATEGY}, "
+        f"scans at {raster_label(OCR_RASTER)}")
 
-        raw = strip_times(ocr_pdf(path, log))
+    cache = OcrCache.from_env()
+    if cache is None:
+        log("[CACHE] OCR cache disabled")
+    else:
+        log(f"[CACHE] OCR cache at {cache.root}")
+
+    with OcrEngine(workers=workers, strategy=OCR_STRATEGY, cache=cache,
+                   raster=OCR_RASTER) as engine:
+        # Queue every page of every file so OCR runs ahead of parsing.
+        engine.prefetch(os.path.join(data_dir, f) for f in files)
+        overlays = process_files(files, data_dir, template_pdf, output_dir, rates,
+                                 engine, log, progress, manifest, digests, depth)
+
+    if cache is not None:
+        log(f"[CACHE] {cache.hits} page hits, {cache.misses} misses")
+
+    built = merge_with_bookmarks(output_dir, log, template_pdf, overlays)
+    if manifest is not None:
+        manifest.save(packet_built=built is not None)
+    log("✅ ALL FILES COMPLETE")
+
+    return logs
 
+
+def process_files(files, data_dir, template_pdf, output_dir, rates, engine,
+                  log, progress, manifest=None, digests=None, depth=PIPELINE_DEPTH):
+    """
+    Process each input PDF; returns {output filename: overlay bytes}.
+
+    Runs as a pipeline: reading (text layer / OCR) and parsing each run in
+    their own thread, at most depth files ahead of PDF generation here, so
+    file N+1 is read and parsed while file N's forms are written.
+
+    The read stage buffers its log lines per file; they are written here,
+    under the file's header, so the log stays in file order. A file that
+    cannot be read is reported as that file's error; the rest go on.
+    """
+
+    def read(file):
+        path = os.path.join(data_dir, file)
+        lines = []
+        try:
+            raw = strip_times(ocr_pdf(path, lines.append, engine, progress))
+        except Exception as e:
+            return file, path, None, lines, f"Could not read PDF: {e}"
+        return file, path, raw, lines, None
+
+    def parse(item):
+        file, path, raw, lines, error = item
+        if error:
+            return file, lines, None, [], "", error
         try:
             name = extract_member_name(raw)
-            log(f"[NAME] {name}")
         except RuntimeError as e:
-            log(f"[ERROR] {e}")
-            continue
+            return file, lines, None, [], "", str(e)
+        inc("sailors")
+        groups = group_by_ship(parse_rows(raw, extract_year_from_filename(path)))
+        return file, lines, name, groups, get_rate(name, rates), None
 
-        year = extract_year_from_filename(path)
-        rows = parse_rows(raw, year)
-        groups = group_by_ship(rows)
-        rate = get_rate(name, rates)
+    overlays = {}
+    for file, lines, name, groups, rate, error in staged(files, read, parse, depth=depth):
+        log(f"[PROCESS] ---- {file} ----")
+        for line in lines:
+            log(line)
+
+        outputs = []
+        if manifest is not None:
+            manifest.discard(file)
 
-        if groups:
-            for g in groups:
-                make_pdf(g, name, rate, template_pdf, output_dir, log)
+        if error:
+            log(f"[ERROR] {file}: {error}")
         else:
-            log("[WARN] No valid sea-pay rows found in this file.")
+            log(f"[NAME] {name}")
+            if groups:
+                for g in groups:
+                    out = make_pdf(g, name, rate, template_pdf, output_dir, log,
+                                   overlays)
+                    outputs.append(os.path.basename(out))
+                    progress("pdfs")
+            else:
+                log(f"[WARN] {file}: No valid sea-pay rows found in this file.")
 
-    merge_with_bookmarks(output_dir, log)
-    log("✅ ALL FILES COMPLETE")
+        # A failed input stays out of the manifest, so every run retries
+        # it and reports the error again
+        if manifest is not None and not error:
+            manifest.record(file, digests[file], outputs)
+        inc("files")
+        progress("files")
+
+    return overlays
 
-    return logs
+
+def run_job(job, data_dir, template_pdf, rate_file, output_dir, incremental=INCREMENTAL):
+    """Background-job wrapper: returns the master packet path, if any."""
+    run_processor(data_dir, template_pdf, rate_file, output_dir,
+                  log_line=job.log, progress=job.advance, incremental=incremental)
+
+    packet = os.path.join(output_dir, PACKET_NAME)
+    return packet if os.path.exists(packet) else None
 
 
 # ------------------------------------------------
@@ -422,14 +581,27 @@ def index():
     rate_file = DEFAULT_RATE_FILE
     output_dir = DEFAULT_OUTPUT_DIR
     logs = []
+    job = None
 
     if request.method == "POST":
-        data_dir = request.form.get("data_dir", data_dir)
-        template_pdf = request.form.get("template_pdf", template_pdf)
-        rate_file = request.form.get("rate_file", rate_file)
-        output_dir = request.form.get("output_dir", output_dir)
+        try:
+            job = JOBS.submit(run_job, _job_params(request.form))
+        except QueueFull as e:
+            logs = [f"[ERROR] Too many batches in progress: {e}"]
+        else:
+            return redirect(url_for("index", job=job.id))
 
-        logs = run_processor(data_dir, template_pdf, rate_file, output_dir)
+    job_id = request.args.get("job")
+    if job_id:
+        job = JOBS.get(job_id)
+        if job is None:
+            logs = [f"[ERROR] Unknown job: {job_id}"]
+        else:
+            data_dir = job.params["data_dir"]
+            template_pdf = job.params["template_pdf"]
+            rate_file = job.params["rate_file"]
+            output_dir = job.params["output_dir"]
+            logs = list(job.logs)
 
     return render_template(
         "index.html",
@@ -437,11 +609,200 @@ def index():
         template_pdf=template_pdf,
         rate_file=rate_file,
         output_dir=output_dir,
-        logs="\n".join(logs)
+        logs="\n".join(logs),
+        job=job.snapshot() if job else None,
     )
 
 
-if __name__ == "__main__":
+def _job_params(form):
+    return {
+        "data_dir": form.get("data_dir", DEFAULT_DATA_DIR),
+        "template_pdf": form.get("template_pdf", DEFAULT_TEMPLATE_PDF),
+        "rate_file": form.get("rate_file", DEFAULT_RATE_FILE),
+        "output_dir": form.get("output_dir", DEFAULT_OUTPUT_DIR),
+        "incremental": INCREMENTAL and not form.get("full_rebuild"),
+    }
+
+
+def _get_job_or_404(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        abort(404)
+    return job
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    params = _job_params(request.get_json(silent=True) or request.form)
+    try:
+        job = JOBS.submit(run_job, params)
+    except QueueFull as e:
+        return {"error": str(e)}, 503
+
+    return {
+        "job_id": job.id,
+        "status_url": url_for("job_status", job_id=job.id),
+    }, 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    return _get_job_or_404(job_id).snapshot(), 200
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    job = _get_job_or_404(job_id)
+
+    def stream():
+        last = None
+        while True:
+            snap = job.snapshot()
+            if snap != last:
+                yield f"data: {json.dumps(snap)}\n\n"
+                last = snap
+            if job.done:
+                return
+            job.wait(timeout=15)
+
+    return Response(stream(), mimetype="text/event-stream")
+
+
+@app.route("/jobs/<job_id>/logs", methods=["GET"])
+def job_logs(job_id):
+    job = _get_job_or_404(job_id)
+    return Response("\n".join(job.logs), mimetype="text/plain")
+
+
+@app.route("/jobs/<job_id>/packet", methods=["GET"])
+def job_packet(job_id):
+    job = _get_job_or_404(job_id)
+    if not job.result:
+        abort(404)
+    return send_file(job.result, as_attachment=True,
+                     download_name=os.path.basename(job.result))
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(METRICS.render(), content_type=CONTENT_TYPE)
+
+
+# ------------------------------------------------
+# COMMAND LINE  (python app.py run ..., for cron)
+# ------------------------------------------------
+EXIT_OK = 0
+EXIT_FAILED = 1     # could not run, or crashed part way
+EXIT_USAGE = 2      # bad arguments (argparse)
+EXIT_PARTIAL = 3    # finished, but some inputs logged errors
+
+
+def run_cli(args):
+    """One headless run_processor() pass; prints a JSON summary, returns the exit code."""
+    if args.quiet:
+        logger.setLevel(logging.WARNING)
+
+    counts = {}
+
+    def progress(key, n=1):
+        counts[key] = counts.get(key, 0) + n
+
+    logs = []
+    error = None
+    started = time.time()
+    METRICS.reset()
+    try:
+        run_processor(args.data, args.template, args.rates, args.output,
+                      workers=args.workers, logs=logs, progress=progress,
+                      incremental=INCREMENTAL and not args.full_rebuild,
+                      depth=args.depth)
+    except Exception as e:
+        logger.exception("Run failed")
+        error = str(e)
+
+    if error or (counts.get("errors") and not counts.get("files")):
+        status, code = "failed", EXIT_FAILED
+    elif counts.get("errors"):
+        status, code = "partial", EXIT_PARTIAL
+    else:
+        status, code = "ok", EXIT_OK
+
+    packet = os.path.join(args.output, PACKET_NAME)
+    summary = {
+        "status": status,
+        "exit_code": code,
+        "error": error,
+        "data_dir": args.data,
+        "output_dir": args.output,
+        "started": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+        "seconds": round(time.time() - started, 3),
+        "files": counts.get("files", 0),
+        "unchanged": counts.get("unchanged", 0),
+        "pages": counts.get("pages", 0),
+        "pdfs": counts.get("pdfs", 0),
+        "errors": counts.get("errors", 0),
+        "warnings": counts.get("warnings", 0),
+        "packet": packet if os.path.exists(packet) else None,
+        "stages": {
+            stage: {"count": count, "seconds": round(total, 3)}
+            for stage, (count, total, _) in METRICS.snapshot()["stages"].items()
+        },
+        "problems": [m for m in logs if m.startswith(("[ERROR]", "[WARN]"))],
+    }
+
+    text = json.dumps(summary, indent=2)
+    print(text)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return code
+
+
+def _positive_int(value):
+    try:
+        n = int(value)
+    except ValueError:
+        n = 0
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be a whole number >= 1, got {value!r}")
+    return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PG-13 Sea Pay batch processor.")
+    commands = parser.add_subparsers(dest="command")
+
+    serve = commands.add_parser("serve", help="run the development web server (default)")
+    serve.add_argument("--port", type=int, default=5000)
+
+    run = commands.add_parser(
+        "run", help="process a data directory once and exit (for cron)",
+        description="Process every PDF in a data directory, build the master "
+                    "packet, print a JSON summary. Exit codes: 0 ok, 1 failed, "
+                    "2 bad arguments, 3 finished with errors in some inputs.",
+    )
+    run.add_argument("--data", default=DEFAULT_DATA_DIR, help="input PDF directory")
+    run.add_argument("--template", default=DEFAULT_TEMPLATE_PDF, help="NAVPERS 1070/613 template")
+    run.add_argument("--rates", default=DEFAULT_RATE_FILE, help="rate CSV (last,first,rate)")
+    run.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="output directory")
+    run.add_argument("--workers", type=_positive_int, default=None,
+                     help=f"OCR worker processes (default {OCR_WORKERS})")
+    run.add_argument("--depth", type=_positive_int, default=PIPELINE_DEPTH,
+                     help="files read/parsed ahead of PDF generation")
+    run.add_argument("--full-rebuild", action="store_true",
+                     help="reprocess every input, not just new or changed ones")
+    run.add_argument("--summary", help="also write the JSON summary to this file")
+    run.add_argument("--quiet", action="store_true", help="only log warnings and errors")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return run_cli(args)
+
     # For local testing; in Docker this also works.
-    app.run(host="0.0.0.0", port=5000)
+    app.run(host="0.0.0.0", port=getattr(args, "port", 5000))
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
 
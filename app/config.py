@@ -1,9 +1,43 @@
 import os
+import tempfile
+
+
+def env_int(name, default):
+    """Positive int from an env var; default when unset or not a positive number."""
+    value = os.environ.get(name, "").strip()
+    return int(value) if value.isdigit() and int(value) > 0 else default
+
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "supersecretkey123456")
 NAME_PREFIX = "Name:"
 SIGNATURE_MARKER = "SIGNATURE"
 SKIP_KEYWORD = "MITE"
 
-PG13_TEMPLATE_PATH = "app/templates_pdf/NAVPERS_1070_613_TEMPLATE.pdf"
+PG13_TEMPLATE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "templates_pdf", "NAVPERS_1070_613_TEMPLATE.pdf"
+)
+
+
+CPU_COUNT = os.cpu_count() or 1
+
+# Processes gunicorn runs the upload app (app.web) in. Each one starts its
+# own PG-13 pool on first use, so by default the cores are split between
+# the pools: WEB_WORKERS x PG13_WORKERS stays about one process per core.
+# More concurrent uploads come from WEB_THREADS, not more workers.
+WEB_WORKERS = env_int("WEB_WORKERS", min(2, CPU_COUNT))
+
+# Worker processes for per-sailor PG-13 generation, per web worker
+PG13_WORKERS = env_int("PG13_WORKERS", max(1, CPU_COUNT // WEB_WORKERS))
+
+# Uploads: hard size cap, and how much of an upload is kept in memory
+# before it spools to the scratch area
+MAX_UPLOAD_MB = env_int("MAX_UPLOAD_MB", 50)
+UPLOAD_SPOOL_KB = env_int("UPLOAD_SPOOL_KB", 4096)
 
+# Scratch area for spooled uploads: total quota, and age after which a
+# directory left behind by a crashed request is swept
+SCRATCH_DIR = os.environ.get("SCRATCH_DIR") or os.path.join(
+    tempfile.gettempdir(), "seapay-scratch"
+)
+SCRATCH_QUOTA_MB = env_int("SCRATCH_QUOTA_MB", 1024)
+SCRATCH_TTL_MINUTES = env_int("SCRATCH_TTL_MINUTES", 60)
@@ -0,0 +1,55 @@
+import re
+from datetime import date
+from functools import lru_cache
+
+# Distinct date strings remembered; a sheet repeats the same few hundred
+MEMO_SIZE = 65536
+
+# The fields strptime accepts for %m/%d/%Y and %m/%d/%y (including its
+# space-padded day), so parse_mdy() takes and rejects the same strings
+_MDY = re.compile(r"(1[0-2]|0[1-9]|[1-9])/(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])/(\d{4}|\d{2})")
+
+
+def _make(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:      # Feb 30 and friends
+        return None
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def parse_mdy(s):
+    """
+    date from "M/D/YYYY" or "M/D/YY", or None.
+
+    Same results as strptime with those two formats (a two-digit year is
+    19YY from 69 up, 20YY below), built from ints instead.
+    """
+    m = _MDY.fullmatch(s.strip())
+    if m is None:
+        return None
+    mm, dd, yy = m.groups()
+    year = int(yy)
+    if len(yy) == 2:
+        year += 2000 if year <= 68 else 1900
+    return _make(year, int(mm), int(dd))
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def row_date(mm, dd, yy, default_year):
+    """
+    date for the "M/D[/Y]" prefix of an OCR'd table row, or None.
+
+    A two-digit year means 20YY and a missing one default_year (the year
+    from the file name); anything but a four-digit year after that is
+    rejected, as is a day that does not exist.
+    """
+    y = ("20" + yy) if (yy and len(yy) == 2) else (yy or default_year)
+    if len(y) != 4 or not y.isdigit():
+        return None
+    return _make(int(y), int(mm), int(dd))
+
+
+def format_mdy(d):
+    """"MM/DD/YYYY" for a date."""
+    return f"{d.month:02d}/{d.day:02d}/{d.year:04d}"
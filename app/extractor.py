@@ -1,127 +1,200 @@
+import logging
+
 import pdfplumber
-import re
-from datetime import datetime
+from bisect import bisect_right
+from collections import namedtuple
+from itertools import accumulate
+from operator import itemgetter
+from pdfplumber.utils import cluster_objects, extract_text
 from app.config import NAME_PREFIX, SKIP_KEYWORD
+from app.dates import parse_mdy
+from app.logs import get_tracer
+from app.metrics import inc, timer
+from app.textnorm import clean_ship_name, clean_ship_names  # noqa: F401
+
+# Same line grouping tolerance pdfplumber's extract_text() uses
+LINE_TOLERANCE = 3
+
+# Any of these on a page marks the end of a sailor block
+SIGNATURE_KEYWORDS = ("SIGNATURE", "CERTIFYING", "OFFICER", "CERTIFICATION")
+
+log = logging.getLogger(__name__)
+trace = get_tracer()
+
+PageAnalysis = namedtuple("PageAnalysis", ["lines", "rows", "name", "signature"])
 
 
 def parse_date(s):
     """Parse dates in M/D/YYYY or M/D/YY formats."""
     if not s:
         return None
-    for fmt in ("%m/%d/%Y", "%m/%d/%y"):
-        try:
-            return datetime.strptime(s.strip(), fmt).date()
-        except:
-            pass
-    return None
+    return parse_mdy(s)
+
+
+def _words_to_text(words):
+    """Join words into lines the way extract_text() does."""
+    lines = cluster_objects(words, itemgetter("top"), LINE_TOLERANCE)
+    return "\n".join(" ".join(w["text"] for w in line) for line in lines)
+
+
+def _table_rows(table, chars):
+    """
+    Cell text for every row of a found table.
+
+    Same result as table.extract(): chars go to every cell holding their
+    midpoint and each cell's chars are joined with extract_text(). Instead
+    of re-scanning every char of the page for every row, each char is
+    placed by bisecting the row tops; reach[i] (the lowest bottom of rows
+    0..i) tells how far back rows can still overlap it.
+    """
+    rows = table.rows
+    tops = [r.bbox[1] for r in rows]
+    reach = list(accumulate((r.bbox[3] for r in rows), max))
+    cell_chars = [[[] for _ in r.cells] for r in rows]
+
+    for ch in chars:
+        v_mid = (ch["top"] + ch["bottom"]) / 2
+        h_mid = (ch["x0"] + ch["x1"]) / 2
+        i = bisect_right(tops, v_mid) - 1
+        while i >= 0 and reach[i] > v_mid:
+            if v_mid < rows[i].bbox[3]:
+                for j, cell in enumerate(rows[i].cells):
+                    if cell and cell[0] <= h_mid < cell[2] and cell[1] <= v_mid < cell[3]:
+                        cell_chars[i][j].append(ch)
+            i -= 1
+
+    return [
+        [None if cell is None else (extract_text(cc) if cc else "")
+         for cell, cc in zip(r.cells, ccs)]
+        for r, ccs in zip(rows, cell_chars)
+    ]
+
+
+def analyze_page(page):
+    """
+    Everything the extractor needs from one page, from a single layout pass.
+
+    Words are extracted once for the text lines and the name / signature
+    markers; the event table's cell text comes from the page's chars.
+    """
+    with timer("text_extract"):
+        words = page.extract_words()
+        lines = _words_to_text(words).split("\n")
+
+    name = None
+    signature = False
+    for line in lines:
+        if name is None and line.startswith(NAME_PREFIX):
+            name = line.replace(NAME_PREFIX, "").strip()
+            name = name.split("SSN")[0].strip()
+        if not signature:
+            up = line.upper()
+            signature = any(k in up for k in SIGNATURE_KEYWORDS)
+
+    with timer("text_extract"):
+        table = page.find_table()
+        rows = _table_rows(table, page.chars) if table else []
+
+    return PageAnalysis(lines, rows, name, signature)
+
+
+def table_events(rows):
+    """(date, cleaned ship) for every dated, non-MITE row of a page table."""
+    with timer("row_parse"):
+        dated = []
+        for row in rows:
+            if not row or not isinstance(row[0], str):
+                continue
+
+            dt = parse_date(row[0])
+            if not dt:
+                continue
+
+            # Combine ship columns
+            ship_raw = " ".join(c for c in row[1:3] if c)
+
+            # Skip MITE rows
+            if SKIP_KEYWORD in ship_raw.upper():
+                continue
+
+            dated.append((dt, ship_raw))
+
+        # Clean the whole page's ship cells in one pass
+        cleaned = clean_ship_names([raw for _, raw in dated])
+    inc("rows", len(dated))
+    return [(dt, ship) for (dt, _), ship in zip(dated, cleaned) if ship]
+
+
+def _sailor(name, events):
+    inc("sailors")
+    return {"name": name, "events": group_by_ship(events)}
 
 
-def clean_ship_name(raw):
-    """Remove junk and return a clean uppercase ship name."""
-    if not raw:
-        return ""
+def extract_sailors_and_events(pdf_path):
+    sailors = list(iter_sailors(pdf_path))
+    log.info("Extracted %d sailors from %s", len(sailors), pdf_path)
+    return sailors
 
-    r = raw
-    r = r.replace("þ", " ")
-    r = re.sub(r"\(.*?\)", " ", r)              # remove (ASW ...)
-    r = re.sub(r"\bUSS\b", " ", r, flags=re.I)  # remove USS prefix
-    r = re.sub(r"\b\d{3,4}\b", " ", r)          # remove times (0000)
-    r = re.sub(r"[\d\-]", " ", r)               # remove digits and hyphens
-    r = re.sub(r"\s+", " ", r)                  # collapse spaces
-    return r.strip().upper()
 
+def iter_sailors(pdf_path):
+    """
+    Yield each sailor block as soon as it is complete.
 
-def extract_sailors_and_events(pdf_path):
-    sailors = []
+    A block ends at a signature line or at the next Name: line, so the
+    caller can start on sailor 1 while later pages are still unread.
+    Stopping the iteration early closes the PDF without parsing the rest.
+    """
     current_name = None
     current_events = []
 
-    print("DEBUG: OPENING PDF", pdf_path)
+    log.debug("Opening PDF %s", pdf_path)
+    tracing = trace.isEnabledFor(logging.DEBUG)
 
     with pdfplumber.open(pdf_path) as pdf:
         for page in pdf.pages:
-            text = page.extract_text() or ""
-            lines = text.split("\n")
+            info = analyze_page(page)
+
+            # Release this page's parsed layout before moving on
+            page.close()
 
             # ----------------------------------------------------------
             # DETECT NEW SAILOR
             # ----------------------------------------------------------
-            for line in lines:
-                if line.startswith(NAME_PREFIX):
-                    name = line.replace(NAME_PREFIX, "").strip()
-                    name = name.split("SSN")[0].strip()
-
-                    # Save previous sailor before starting a new one
-                    if current_name and current_events:
-                        sailors.append({
-                            "name": current_name,
-                            "events": group_by_ship(current_events)
-                        })
-
-                    current_name = name
-                    current_events = []
-                    print("DEBUG: NEW SAILOR =", current_name)
-                    break
+            if info.name is not None:
+                # Save previous sailor before starting a new one
+                if current_name and current_events:
+                    yield _sailor(current_name, current_events)
+
+                current_name = info.name
+                current_events = []
+                log.debug("New sailor %s", current_name)
 
             # ----------------------------------------------------------
             # READ TABLE EVENTS
             # ----------------------------------------------------------
-            table = page.extract_table()
-            if table:
-                for row in table:
-                    if not row or not isinstance(row[0], str):
-                        continue
-
-                    dt = parse_date(row[0])
-                    if not dt:
-                        continue
-
-                    # Combine ship columns
-                    ship_raw = " ".join(c for c in row[1:3] if c)
-
-                    # Skip MITE rows
-                    if SKIP_KEYWORD in ship_raw.upper():
-                        continue
-
-                    ship_clean = clean_ship_name(ship_raw)
-                    if ship_clean:
-                        current_events.append((dt, ship_clean))
-                        print("DEBUG: EVENT", dt, ship_clean)
+            events = table_events(info.rows)
+            current_events.extend(events)
+            if tracing:
+                for dt, ship_clean in events:
+                    trace.debug("Event %s %s (%s)", dt, ship_clean, current_name)
 
             # ----------------------------------------------------------
             # SIGNATURE = END OF SAILOR BLOCK
             # Flexible detection (real Navy PDFs vary)
             # ----------------------------------------------------------
-            for line in lines:
-                up = line.upper()
-                if (
-                    "SIGNATURE" in up or
-                    "CERTIFYING" in up or
-                    "OFFICER" in up or
-                    "CERTIFICATION" in up
-                ):
-                    print("DEBUG: SIGNATURE DETECTED for", current_name)
-                    if current_name:
-                        sailors.append({
-                            "name": current_name,
-                            "events": group_by_ship(current_events)
-                        })
-                    current_name = None
-                    current_events = []
-                    break
+            if info.signature:
+                log.debug("Signature detected for %s", current_name)
+                if current_name:
+                    yield _sailor(current_name, current_events)
+                current_name = None
+                current_events = []
 
     # ----------------------------------------------------------
     # SAFETY: Save last sailor even if signature not found
     # ----------------------------------------------------------
     if current_name and current_events:
-        print("DEBUG: FORCING SAVE FINAL SAILOR", current_name)
-        sailors.append({
-            "name": current_name,
-            "events": group_by_ship(current_events)
-        })
-
-    print("DEBUG: FINAL SAILORS =", sailors)
-    return sailors
+        log.debug("No signature after %s, saving at end of file", current_name)
+        yield _sailor(current_name, current_events)
 
 
 def group_by_ship(events):
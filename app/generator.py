@@ -1,5 +1,10 @@
+import io
+import logging
 import os
+import re
+import threading
 import zipfile
+from collections import deque
 from datetime import datetime
 
 from reportlab.pdfgen import canvas
@@ -7,15 +12,29 @@ from reportlab.lib.pagesizes import letter
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
-from PyPDF2 import PdfReader, PdfWriter, PageObject
+from app.config import PG13_TEMPLATE_PATH, PG13_WORKERS
+from app.metrics import METRICS, in_worker, inc, timer, worker_pool
+from app.pdf_template import load_template
+from app.ship_matcher import match_ship, match_ships
 
-from app.config import PG13_TEMPLATE_PATH
-from app.ship_matcher import match_ship
+log = logging.getLogger(__name__)
 
 
-# Register Times New Roman
-FONT_PATH = "/app/app/fonts/times.ttf"
-pdfmetrics.registerFont(TTFont("TimesNewRoman", FONT_PATH))
+# Times New Roman, shipped with the app; registered on first use
+FONT_NAME = "TimesNewRoman"
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts", "times.ttf")
+
+_font_lock = threading.Lock()
+_font_registered = False
+
+
+def register_fonts():
+    """Register FONT_NAME with reportlab (once per process)."""
+    global _font_registered
+    with _font_lock:
+        if not _font_registered:
+            pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+            _font_registered = True
 
 
 def format_mmddyy(date_obj):
@@ -39,63 +58,196 @@ X_NAME = inches_to_points(0.63)    # NAME (LAST, FIRST, MIDDLE)
 Y_NAME = inches_to_points(0.88)
 
 
+def zip_name(sailor):
+    """Download name for a sailor's ZIP."""
+    return f"{sailor['name'].split()[0].upper()}.zip"
+
+
+def pg13_filename(ship_raw, start, end):
+    """Unique-per-period PDF name: ship plus date range."""
+    safe = re.sub(r"[^A-Z0-9]+", "_", ship_raw.upper()).strip("_") or "SHIP"
+    return f"{safe}_{start.strftime('%m%d%y')}_TO_{end.strftime('%m%d%y')}.pdf"
+
+
+def iter_pg13_pdfs(sailor):
+    """Yield (filename, pdf bytes) for every ship event of a sailor."""
+    events = sailor["events"]
+    with timer("ship_match"):
+        ships = match_ships([ship_raw for ship_raw, _, _ in events])
+
+    seen = {}
+    for (ship_raw, start, end), ship in zip(events, ships):
+        filename = pg13_filename(ship_raw, start, end)
+        seen[filename] = seen.get(filename, 0) + 1
+        if seen[filename] > 1:
+            filename = filename.replace(".pdf", f"_{seen[filename]}.pdf")
+        yield filename, build_pg13_pdf(sailor["name"], ship_raw, start, end, ship)
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only sink that hands back whatever ZipFile wrote since last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_pg13_zip(sailor):
+    """
+    Stream a ZIP of one PG13 per ship event as it is built.
+
+    Each PDF is rendered in memory, compressed into the archive and
+    yielded straight away, so only one form is ever held at a time.
+    """
+    sink = _ChunkBuffer()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+        for filename, data in iter_pg13_pdfs(sailor):
+            with timer("zip"):
+                zf.writestr(filename, data)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def sailor_folder(sailor):
+    """Archive folder name for a sailor, e.g. "DOE_JOHN"."""
+    return re.sub(r"[^A-Z0-9]+", "_", sailor["name"].upper()).strip("_") or "SAILOR"
+
+
+def _sailor_pdfs(sailor):
+    # Top-level so it can be pickled into the worker processes.
+    return list(iter_pg13_pdfs(sailor))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Shared process pool for per-sailor generation, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = worker_pool(PG13_WORKERS)
+        return _pool
+
+
+def iter_sailor_pdfs(sailors):
+    """
+    Yield (sailor, [(filename, pdf bytes), ...]) for every sailor, in order.
+
+    Each sailor's forms are built in one of the PG13_WORKERS pool
+    processes. Sailors are pulled from the (possibly lazy) iterable as
+    slots free up, so extraction of later sailors overlaps generation, and
+    at most 2 x PG13_WORKERS sailors' results are held at once.
+    """
+    if PG13_WORKERS <= 1:
+        for sailor in sailors:
+            yield sailor, _sailor_pdfs(sailor)
+        return
+
+    pool = _get_pool()
+    pending = deque()
+    for sailor in sailors:
+        pending.append((sailor, pool.submit(in_worker, _sailor_pdfs, sailor)))
+        while len(pending) >= 2 * PG13_WORKERS:
+            yield _collect(*pending.popleft())
+    while pending:
+        yield _collect(*pending.popleft())
+
+
+def _collect(sailor, future):
+    pdfs, snap = future.result()
+    METRICS.merge(snap)
+    return sailor, pdfs
+
+
+def iter_command_zip(sailors):
+    """
+    Stream one ZIP with a folder of PG13s per sailor.
+
+    Generation fans out across the worker pool; the archive is written
+    in sailor order and each sailor's folder is yielded as soon as it is
+    ready.
+    """
+    sink = _ChunkBuffer()
+    folders = {}
+    forms = 0
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+        for sailor, pdfs in iter_sailor_pdfs(sailors):
+            forms += len(pdfs)
+            folder = sailor_folder(sailor)
+            folders[folder] = folders.get(folder, 0) + 1
+            if folders[folder] > 1:
+                folder = f"{folder}_{folders[folder]}"
+            with timer("zip"):
+                for filename, data in pdfs:
+                    zf.writestr(f"{folder}/{filename}", data)
+            yield sink.drain()
+    yield sink.drain()
+    log.info("Archive done: %d PG-13s for %d sailors", forms, sum(folders.values()))
+
+
 def generate_pg13_zip(sailor, output_dir):
     """Create a ZIP containing one PG13 per ship event."""
-    last = sailor["name"].split()[0].upper()
-    zip_path = os.path.join(output_dir, f"{last}.zip")
+    zip_path = os.path.join(output_dir, zip_name(sailor))
 
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-        for ship_raw, start, end in sailor["events"]:
-            pdf_path = make_pg13_pdf(sailor["name"], ship_raw, start, end, output_dir)
-            zf.write(pdf_path, os.path.basename(pdf_path))
+    with open(zip_path, "wb") as f:
+        for chunk in iter_pg13_zip(sailor):
+            f.write(chunk)
 
     return zip_path
 
 
-def make_pg13_pdf(name, ship_raw, start, end, root_dir):
-    """Generate one completed NAVPERS 1070/613 with proper coordinates."""
-    output_path = os.path.join(root_dir, f"{ship_raw}.pdf")
-
-    # Clean ship name
-    ship = match_ship(ship_raw)
+def build_pg13_pdf(name, ship_raw, start, end, ship=None):
+    """Generate one completed NAVPERS 1070/613 as PDF bytes."""
+    # Clean ship name (unless the caller already resolved it)
+    if ship is None:
+        with timer("ship_match"):
+            ship = match_ship(ship_raw)
 
     # Build text lines
     line1 = f"REPORT CAREER SEA PAY FROM {format_mmddyy(start)} TO {format_mmddyy(end)}."
     line2 = f"Member performed eight continuous hours per day on-board: {ship} Category A vessel."
 
-    # Load template
-    template_reader = PdfReader(PG13_TEMPLATE_PATH)
-    template_page = template_reader.pages[0]
-
-    # Create overlay PDF
-    overlay_path = os.path.join(root_dir, "overlay.pdf")
-    c = canvas.Canvas(overlay_path, pagesize=letter)
+    # Create overlay PDF in memory
+    with timer("overlay_render"):
+        register_fonts()
+        buf = io.BytesIO()
+        c = canvas.Canvas(buf, pagesize=letter)
 
-    # All fields use Times New Roman, size 10
-    c.setFont("TimesNewRoman", 10)
+        # All fields use Times New Roman, size 10
+        c.setFont(FONT_NAME, 10)
 
-    # Draw text at mapped coordinates
-    c.drawString(X_LINE1, Y_LINE1, line1)
-    c.drawString(X_LINE2, Y_LINE2, line2)
-    c.drawString(X_NAME, Y_NAME, name)
+        # Draw text at mapped coordinates
+        c.drawString(X_LINE1, Y_LINE1, line1)
+        c.drawString(X_LINE2, Y_LINE2, line2)
+        c.drawString(X_NAME, Y_NAME, name)
 
-    c.save()
+        c.save()
 
-    # Merge template + overlay
-    overlay_reader = PdfReader(overlay_path)
-    overlay_page = overlay_reader.pages[0]
+    # Stamp overlay onto the cached template
+    with timer("template_merge"):
+        data = load_template(PG13_TEMPLATE_PATH).render(buf.getvalue())
+    inc("pdfs")
+    return data
 
-    merged_page = PageObject.create_blank_page(
-        width=template_page.mediabox.width,
-        height=template_page.mediabox.height
-    )
-    merged_page.merge_page(template_page)
-    merged_page.merge_page(overlay_page)
 
-    writer = PdfWriter()
-    writer.add_page(merged_page)
+def make_pg13_pdf(name, ship_raw, start, end, root_dir):
+    """Generate one completed NAVPERS 1070/613 with proper coordinates."""
+    output_path = os.path.join(root_dir, pg13_filename(ship_raw, start, end))
 
     with open(output_path, "wb") as f:
-        writer.write(f)
+        f.write(build_pg13_pdf(name, ship_raw, start, end))
 
     return output_path
@@ -0,0 +1,147 @@
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import env_int
+
+# Defaults; override with JOB_WORKERS / JOB_QUEUE_LIMIT / JOB_HISTORY
+DEFAULT_JOB_WORKERS = 1
+DEFAULT_JOB_QUEUE_LIMIT = 16
+DEFAULT_JOB_HISTORY = 50
+
+
+class QueueFull(RuntimeError):
+    """Raised when too many jobs are already queued or running."""
+
+
+class Job:
+    """State of one background batch: status, counters, logs and result."""
+
+    def __init__(self, params):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = "queued"
+        self.progress = {"files_total": 0, "files": 0, "pages": 0, "pdfs": 0}
+        self.logs = []
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def advance(self, key, n=1):
+        """Bump a progress counter and wake anyone waiting on the job."""
+        with self._changed:
+            self.progress[key] = self.progress.get(key, 0) + n
+            self._changed.notify_all()
+
+    def log(self, msg):
+        """Append a log line and wake anyone waiting on the job."""
+        with self._changed:
+            self.logs.append(msg)
+            self._changed.notify_all()
+
+    def _set_status(self, status):
+        with self._changed:
+            self.status = status
+            self._changed.notify_all()
+
+    def wait(self, timeout=None):
+        """Block until the job changes (or the timeout passes)."""
+        with self._changed:
+            if not self.done:
+                self._changed.wait(timeout)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "result": self.result,
+                "error": self.error,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+                "log_lines": len(self.logs),
+            }
+
+
+class JobQueue:
+    """
+    Bounded background runner for batch jobs.
+
+    At most max_workers jobs run at once (each one already fans out over
+    the OCR process pool), and submissions beyond queue_limit pending or
+    running jobs are rejected with QueueFull instead of piling up.
+    Finished jobs are kept in memory, newest history entries only.
+    """
+
+    def __init__(self, max_workers=None, queue_limit=None, history=None):
+        self.max_workers = max_workers or env_int("JOB_WORKERS", DEFAULT_JOB_WORKERS)
+        self.queue_limit = queue_limit or env_int("JOB_QUEUE_LIMIT", DEFAULT_JOB_QUEUE_LIMIT)
+        self.history = history or env_int("JOB_HISTORY", DEFAULT_JOB_HISTORY)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="job"
+        )
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, params):
+        """
+        Queue fn(job, **params) and return the Job straight away.
+
+        fn reports progress through job.advance() and job.log(), and its
+        return value becomes job.result.
+        """
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if not j.done)
+            if active >= self.queue_limit:
+                raise QueueFull(f"{active} jobs already queued or running")
+            job = Job(params)
+            self._jobs[job.id] = job
+            self._trim()
+
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _trim(self):
+        finished = [j.id for j in self._jobs.values() if j.done]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def _run(self, job, fn):
+        job.started = time.time()
+        job._set_status("running")
+        try:
+            job.result = fn(job, **job.params)
+        except Exception as e:
+            job.error = str(e)
+            job.log(f"[ERROR] {e}")
+            for line in traceback.format_exc().splitlines():
+                job.log(line)
+            job.finished = time.time()
+            job._set_status("failed")
+            return
+        job.finished = time.time()
+        job._set_status("done")
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,24 @@
+import importlib.util
+import os
+import sys
+
+# Module name app.py is imported under
+BATCH_MODULE = "seapay_batch"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_batch_app():
+    """
+    Import the top-level app.py (the /data batch processor).
+
+    It is shadowed by the app/ package on sys.path, so load it by file
+    path under its own module name, once per process.
+    """
+    if BATCH_MODULE in sys.modules:
+        return sys.modules[BATCH_MODULE]
+    spec = importlib.util.spec_from_file_location(BATCH_MODULE, os.path.join(ROOT, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[BATCH_MODULE] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,53 @@
+import logging
+import os
+
+# Defaults; override with LOG_LEVEL / TRACE_EVENTS
+DEFAULT_LOG_LEVEL = "INFO"
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Per-row / per-event lines go to this logger. It stays silent unless
+# TRACE_EVENTS=1, whatever LOG_LEVEL says, so a DEBUG run of a large
+# sheet does not write a line per table row.
+TRACE_LOGGER = "seapay.trace"
+
+# LOG_LEVEL applies to these; everything else (pdfminer logs every
+# token at DEBUG) stays at WARNING
+APP_LOGGERS = ("app", "seapay")
+
+_configured = False
+
+
+def trace_enabled():
+    return os.environ.get("TRACE_EVENTS", "").strip().lower() in ("1", "true", "yes")
+
+
+def configure_logging():
+    """Set up the root handler once, from LOG_LEVEL and TRACE_EVENTS."""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    level = os.environ.get("LOG_LEVEL", DEFAULT_LOG_LEVEL).strip().upper()
+    if not isinstance(logging.getLevelName(level), int):
+        level = DEFAULT_LOG_LEVEL
+    logging.basicConfig(level=logging.WARNING, format=LOG_FORMAT)
+    for name in APP_LOGGERS:
+        logging.getLogger(name).setLevel(level)
+
+    trace = logging.getLogger(TRACE_LOGGER)
+    if trace_enabled():
+        trace.setLevel(logging.DEBUG)
+    else:
+        trace.setLevel(logging.CRITICAL + 1)
+
+
+def get_tracer():
+    """
+    Logger for per-event tracing.
+
+    Call sites check tracer.isEnabledFor(logging.DEBUG) before the loop
+    so nothing is built or formatted when tracing is off.
+    """
+    return logging.getLogger(TRACE_LOGGER)
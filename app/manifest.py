@@ -0,0 +1,116 @@
+import json
+import os
+
+from app.ocr_cache import file_hash
+
+MANIFEST_NAME = ".seapay_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def optional_hash(path):
+    """Content hash of path, or "" when it does not exist."""
+    return file_hash(path) if path and os.path.isfile(path) else ""
+
+
+class RunManifest:
+    """
+    Record of the last batch run over an output directory.
+
+    For every input PDF it keeps the content hash and the output PDFs it
+    produced; alongside that, the settings the run used (rate CSV and
+    template hashes, OCR strategy) and the list of outputs that went into
+    the master packet. A settings change invalidates every entry and
+    deletes the outputs it recorded (listed in removed).
+    """
+
+    def __init__(self, output_dir, settings):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.output_dir = output_dir
+        self.settings = settings
+        self.files = {}
+        self.packet = None
+        self.removed = []
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self.files = data.get("files", {})
+        if data.get("settings") == settings:
+            self.packet = data.get("packet")
+            return
+
+        # Outputs named under the old settings (a different rate prefix,
+        # say) would not be overwritten and would end up in the packet
+        for name in list(self.files):
+            self.removed.extend(self.discard(name))
+
+    def unchanged(self, name, digest):
+        """True when name was processed with this content and its outputs exist."""
+        entry = self.files.get(name)
+        if not entry or entry["hash"] != digest:
+            return False
+        return all(
+            os.path.exists(os.path.join(self.output_dir, out))
+            for out in entry["outputs"]
+        )
+
+    def _owned_elsewhere(self, name):
+        owned = set()
+        for other, entry in self.files.items():
+            if other != name:
+                owned.update(entry["outputs"])
+        return owned
+
+    def discard(self, name):
+        """Forget an input and delete outputs no other input still claims."""
+        entry = self.files.get(name)
+        if not entry:
+            return []
+        keep = self._owned_elsewhere(name)
+        removed = []
+        for out in entry["outputs"]:
+            if out in keep:
+                continue
+            try:
+                os.remove(os.path.join(self.output_dir, out))
+                removed.append(out)
+            except OSError:
+                pass
+        del self.files[name]
+        return removed
+
+    def prune(self, names):
+        """Drop entries for inputs that are no longer in the data dir."""
+        removed = []
+        for name in [n for n in self.files if n not in names]:
+            removed.extend(self.discard(name))
+        return removed
+
+    def record(self, name, digest, outputs):
+        self.files[name] = {"hash": digest, "outputs": sorted(outputs)}
+
+    def outputs(self):
+        return sorted({out for entry in self.files.values() for out in entry["outputs"]})
+
+    def packet_current(self, packet_path):
+        """True when the master packet was built from exactly today's outputs."""
+        return os.path.exists(packet_path) and self.packet == self.outputs()
+
+    def save(self, packet_built=False):
+        if packet_built:
+            self.packet = self.outputs()
+        tmp = self.path + ".tmp"
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "settings": self.settings,
+                "files": self.files,
+                "packet": self.packet,
+            }, f, indent=1)
+        os.replace(tmp, self.path)
@@ -0,0 +1,153 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Stage names used across the apps, in pipeline order
+STAGES = (
+    "rasterize", "ocr", "text_extract", "row_parse", "ship_match",
+    "overlay_render", "template_merge", "zip", "master_merge",
+)
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _stage_order(stage):
+    # Known stages in pipeline order, anything else after them by name
+    return (STAGES.index(stage), "") if stage in STAGES else (len(STAGES), stage)
+
+
+def _fmt(labels):
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in labels)
+    return "{" + inner + "}"
+
+
+class Metrics:
+    """
+    In-process stage timers and counters.
+
+    timer("ocr") adds the elapsed wall time of a block to that stage;
+    inc("pages", source="ocr") bumps a labelled counter. render() gives
+    the Prometheus text format served on /metrics.
+
+    Each process has its own registry. Work done in a pool worker is
+    shipped back with the result via in_worker() / merge(), so the web
+    process still sees the totals.
+    """
+
+    def __init__(self, prefix="seapay"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._stages = {}
+
+    def inc(self, name, n=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            count, total, peak = self._stages.get(stage, (0, 0.0, 0.0))
+            self._stages[stage] = (count + 1, total + seconds, max(peak, seconds))
+
+    @contextmanager
+    def timer(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def snapshot(self):
+        with self._lock:
+            return {"counters": dict(self._counters), "stages": dict(self._stages)}
+
+    def drain(self):
+        """Snapshot and reset in one step (used by pool workers)."""
+        with self._lock:
+            snap = {"counters": self._counters, "stages": self._stages}
+            self._counters = {}
+            self._stages = {}
+        return snap
+
+    def merge(self, snap):
+        """Fold a snapshot from another process into this registry."""
+        with self._lock:
+            for key, n in snap["counters"].items():
+                self._counters[key] = self._counters.get(key, 0) + n
+            for stage, (count, total, peak) in snap["stages"].items():
+                c, t, p = self._stages.get(stage, (0, 0.0, 0.0))
+                self._stages[stage] = (c + count, t + total, max(p, peak))
+
+    def reset(self):
+        self.drain()
+
+    def render(self):
+        """Prometheus text exposition of every timer and counter."""
+        snap = self.snapshot()
+        p = self.prefix
+        out = [
+            f"# HELP {p}_stage_seconds Wall time spent per pipeline stage.",
+            f"# TYPE {p}_stage_seconds summary",
+        ]
+        stages = snap["stages"]
+        order = sorted(stages, key=_stage_order)
+        for stage in order:
+            count, total, _ = stages[stage]
+            out.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {count}')
+            out.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+        out.append(f"# HELP {p}_stage_seconds_max Slowest single call per stage.")
+        out.append(f"# TYPE {p}_stage_seconds_max gauge")
+        for stage in order:
+            out.append(f'{p}_stage_seconds_max{{stage="{stage}"}} {stages[stage][2]:.6f}')
+
+        by_name = {}
+        for (name, labels), n in snap["counters"].items():
+            by_name.setdefault(name, []).append((labels, n))
+        for name in sorted(by_name):
+            out.append(f"# TYPE {p}_{name}_total counter")
+            for labels, n in sorted(by_name[name]):
+                out.append(f"{p}_{name}_total{_fmt(labels)} {n}")
+        return "\n".join(out) + "\n"
+
+
+METRICS = Metrics()
+
+timer = METRICS.timer
+inc = METRICS.inc
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def in_worker(fn, *args):
+    """
+    Run fn in a pool worker and return (result, metrics recorded by it).
+
+    The registry is drained first, so whatever a worker inherited from
+    the process it was forked from is not reported twice.
+    """
+    METRICS.drain()
+    result = fn(*args)
+    return result, METRICS.drain()
+
+
+def worker_pool(max_workers):
+    """
+    Process pool for in_worker() jobs.
+
+    Workers are forked from a forkserver, not from the calling process:
+    the apps start pools while request, job and pipeline threads are
+    taking METRICS' lock (and the ship memo and template locks), and a
+    child forked while one of them is held deadlocks the first time it
+    takes that lock.
+    """
+    # Imported here: the web app loads this module on every request path
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(max_workers=max_workers,
+                               mp_context=multiprocessing.get_context("forkserver"))
@@ -0,0 +1,338 @@
+import os
+from collections import namedtuple
+
+from app.metrics import METRICS, in_worker, inc, timer, worker_pool
+from app.ocr_cache import file_hash
+
+# Page reading strategies:
+#   auto - use the embedded text layer, OCR only pages that fail the check
+#   ocr  - always rasterize and OCR (the original behaviour)
+#   text - text layer only, never OCR
+STRATEGIES = ("auto", "ocr", "text")
+
+# A text layer shorter than this (non-blank chars) is treated as missing
+MIN_TEXT_CHARS = 40
+
+# Page text plus the path it came from ("text" or "ocr")
+PageText = namedtuple("PageText", ["page", "text", "source"])
+
+# How scanned pages are rendered for Tesseract:
+#   dpi    - render resolution (OCR_DPI, default 200)
+#   color  - "color" (default), "gray" or "mono" (thresholded 1-bit)
+#   region - (left, top, right, bottom) page fractions to OCR, or None for
+#            the whole page (OCR_REGION="full" | "body" | "l,t,r,b").
+#            There is no name-header-plus-table preset: the table's
+#            length varies per sheet, so "body" (everything above the
+#            signature block) is as tight as a fixed box can safely be.
+#            For a layout you know, give the header + table box as
+#            "l,t,r,b".
+RasterOptions = namedtuple("RasterOptions", ["dpi", "color", "region"])
+
+COLOR_MODES = ("color", "gray", "mono")
+DEFAULT_DPI = 200
+
+# Full width, top of the page down to just above the certifying official's
+# signature block; only the form footer and signatures are left out
+BODY_REGION = (0.0, 0.0, 1.0, 0.86)
+
+# What every scan was rendered with before these options existed; cache
+# fingerprints and run manifests only mention the raster when it differs
+DEFAULT_RASTER = RasterOptions(DEFAULT_DPI, "color", None)
+
+# Threshold for "mono" (0-255 gray); darker pixels become black
+MONO_THRESHOLD = 160
+
+# Tesseract binary (inside the container it will be in PATH)
+TESSERACT_CMD = "tesseract"
+
+
+def _tesseract():
+    # Imported on first use: pytesseract pulls in numpy, and text-layer
+    # runs never need it
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    return pytesseract
+
+
+def default_workers():
+    """Worker count from OCR_WORKERS, falling back to every core."""
+    value = os.environ.get("OCR_WORKERS", "").strip()
+    if value.isdigit() and int(value) > 0:
+        return int(value)
+    return os.cpu_count() or 1
+
+
+def default_strategy():
+    """Page strategy from OCR_STRATEGY, falling back to "auto"."""
+    value = os.environ.get("OCR_STRATEGY", "").strip().lower()
+    return value if value in STRATEGIES else "auto"
+
+
+def _parse_region(value):
+    value = value.strip().lower()
+    if value in ("", "full"):
+        return None
+    if value == "body":
+        return BODY_REGION
+    try:
+        box = tuple(float(v) for v in value.split(","))
+    except ValueError:
+        return None
+    if len(box) != 4 or not (0 <= box[0] < box[2] <= 1 and 0 <= box[1] < box[3] <= 1):
+        return None
+    return box
+
+
+def default_raster():
+    """Raster options from OCR_DPI / OCR_COLOR / OCR_REGION."""
+    dpi = os.environ.get("OCR_DPI", "").strip()
+    color = os.environ.get("OCR_COLOR", "").strip().lower()
+    return RasterOptions(
+        dpi=int(dpi) if dpi.isdigit() and int(dpi) > 0 else DEFAULT_DPI,
+        color=color if color in COLOR_MODES else DEFAULT_RASTER.color,
+        region=_parse_region(os.environ.get("OCR_REGION", "")),
+    )
+
+
+def raster_label(raster):
+    """Short description, e.g. "200 dpi color" or "300 dpi mono, region 0,0,1,0.86"."""
+    label = f"{raster.dpi} dpi {raster.color}"
+    if raster.region is not None:
+        label += ", region " + ",".join(f"{v:g}" for v in raster.region)
+    return label
+
+
+def page_count(path):
+    """Number of pages in a PDF."""
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def text_layer_ok(text):
+    """
+    Quality check for an embedded text layer.
+
+    Scanned sheets either have no text at all or a few stray characters;
+    broken font encodings show up as "(cid:NN)" runs. Either way OCR wins.
+    """
+    chars = "".join(text.split())
+    if len(chars) < MIN_TEXT_CHARS:
+        return False
+    if "(cid:" in text:
+        return False
+    alnum = sum(1 for ch in chars if ch.isalnum())
+    return alnum / len(chars) >= 0.5
+
+
+def text_layer_page(path, page_no):
+    """Embedded text of a single 1-based page, or "" if it has none."""
+    import pdfplumber
+    with timer("text_extract"), pdfplumber.open(path, pages=[page_no]) as pdf:
+        page = pdf.pages[0]
+        text = page.extract_text() or ""
+        page.close()
+    return text + "\n" if text else ""
+
+
+def rasterize_page(path, page_no, raster=None):
+    """
+    Render a single 1-based page the way Tesseract will see it.
+
+    Only that page is rendered (pdftoppm's page range): in color by
+    default, straight to grayscale for "gray" and "mono". A "mono" page is
+    then thresholded, and the region, if any, cropped out.
+    """
+    from pdf2image import convert_from_path
+
+    raster = raster or default_raster()
+    images = convert_from_path(
+        path, dpi=raster.dpi, first_page=page_no, last_page=page_no,
+        grayscale=raster.color != "color",
+    )
+    img = images[0]
+
+    if raster.region is not None:
+        w, h = img.size
+        left, top, right, bottom = raster.region
+        img = img.crop((int(left * w), int(top * h), int(right * w), int(bottom * h)))
+    if raster.color == "mono":
+        img = img.point(lambda px: 255 if px > MONO_THRESHOLD else 0, mode="1")
+    return img
+
+
+def ocr_page(path, page_no, raster=None):
+    """Rasterize and OCR a single 1-based page of a PDF."""
+    with timer("rasterize"):
+        img = rasterize_page(path, page_no, raster)
+    with timer("ocr"):
+        return _tesseract().image_to_string(img)
+
+
+def read_page(path, page_no, strategy="auto", raster=None):
+    """Read one page with the given strategy and report which path won."""
+    if strategy != "ocr":
+        text = text_layer_page(path, page_no)
+        if strategy == "text" or text_layer_ok(text):
+            inc("pages", source="text")
+            return PageText(page_no, text, "text")
+    inc("pages", source="ocr")
+    return PageText(page_no, ocr_page(path, page_no, raster), "ocr")
+
+
+def tesseract_version():
+    """Installed Tesseract version as a string, or "none"."""
+    pytesseract = _tesseract()
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except (pytesseract.TesseractNotFoundError, OSError):
+        return "none"
+
+
+def _read_job(job):
+    # Top-level so it can be pickled into the worker processes.
+    return read_page(*job)
+
+
+def _collect(future):
+    """Result of an in_worker() job, folding its metrics into ours."""
+    page, snap = future.result()
+    METRICS.merge(snap)
+    return page
+
+
+class OcrEngine:
+    """
+    Page-level text extraction over a process pool.
+
+    Every page of every submitted PDF becomes its own job, so a directory
+    of sheets keeps all cores busy. Each job tries the embedded text layer
+    first (unless the strategy is "ocr") and falls back to Tesseract.
+    Results are always joined back in page order.
+
+    With an OcrCache, pages already read under the same settings are
+    served from disk and never reach the pool.
+    """
+
+    def __init__(self, workers=None, strategy=None, cache=None, raster=None):
+        self.workers = workers or default_workers()
+        self.strategy = strategy or default_strategy()
+        self.raster = raster or default_raster()
+        self.cache = cache
+        self._settings = None
+        self._pool = None
+        self._pending = {}
+
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"Unknown OCR strategy: {self.strategy}")
+
+        if self.workers > 1:
+            self._pool = worker_pool(self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            for _, items in self._pending.values():
+                for item in items:
+                    if not isinstance(item, PageText):
+                        item.cancel()
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        self._pending.clear()
+        if self.cache is not None:
+            self.cache.evict()
+
+    @property
+    def settings(self):
+        """Fingerprint of everything that changes the text of a page."""
+        if self._settings is None:
+            self._settings = (
+                f"strategy={self.strategy}"
+                f"|min_text={MIN_TEXT_CHARS}"
+                f"|tesseract={tesseract_version()}"
+            )
+            if self.raster != DEFAULT_RASTER:
+                self._settings += f"|raster={raster_label(self.raster)}"
+        return self._settings
+
+    def _plan(self, path):
+        """
+        Split a PDF into cached PageTexts and page numbers still to read.
+
+        Returns (digest, items) where items holds a PageText for every
+        cache hit and the bare page number for every miss.
+        """
+        if self.cache is None:
+            return None, list(range(1, page_count(path) + 1))
+
+        digest = file_hash(path)
+        meta = self.cache.get(digest, "pages", count=False)
+        if meta is None:
+            meta = {"pages": page_count(path)}
+            self.cache.put(meta, digest, "pages")
+
+        items = []
+        for n in range(1, meta["pages"] + 1):
+            hit = self.cache.get(digest, n, self.settings)
+            items.append(PageText(n, hit["text"], hit["source"]) if hit else n)
+        return digest, items
+
+    def _store(self, digest, page):
+        if self.cache is not None:
+            self.cache.put(
+                {"text": page.text, "source": page.source},
+                digest, page.page, self.settings,
+            )
+        return page
+
+    def submit(self, path):
+        """Queue every uncached page of a PDF without waiting for results."""
+        if self._pool is None or path in self._pending:
+            return
+        digest, items = self._plan(path)
+        self._pending[path] = (digest, [
+            item if isinstance(item, PageText)
+            else self._pool.submit(
+                in_worker, _read_job, (path, item, self.strategy, self.raster))
+            for item in items
+        ])
+
+    def prefetch(self, paths):
+        """
+        Queue several PDFs up front so their pages overlap on the pool.
+
+        A PDF that cannot be opened is left out here; read_pdf() raises
+        for it when that file's turn comes.
+        """
+        for path in paths:
+            try:
+                self.submit(path)
+            except Exception:
+                pass
+
+    def read_pdf(self, path):
+        """Return a PageText for every page of a PDF, in page order."""
+        if self._pool is None:
+            digest, items = self._plan(path)
+            return [
+                item if isinstance(item, PageText)
+                else self._store(digest, read_page(path, item, self.strategy, self.raster))
+                for item in items
+            ]
+
+        self.submit(path)
+        digest, items = self._pending.pop(path)
+        return [
+            item if isinstance(item, PageText)
+            else self._store(digest, _collect(item))
+            for item in items
+        ]
+
+    def ocr_pdf(self, path):
+        """Return the raw text of a PDF, pages joined in order."""
+        return "".join(p.text for p in self.read_pdf(path))
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from app.metrics import inc
+
+# Defaults; override with OCR_CACHE_DIR / OCR_CACHE_MAX_MB
+DEFAULT_CACHE_DIR = "/config/ocr_cache"
+DEFAULT_CACHE_MAX_MB = 512
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class OcrCache:
+    """
+    Persistent, content-addressed store of page text.
+
+    Entries live as small JSON files named by a hash of
+    (file content hash, page, settings fingerprint), so renaming or
+    re-uploading the same PDF still hits. Reads bump the entry's mtime;
+    when the directory grows past max_bytes the least recently used
+    entries are evicted first.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Build the cache from env vars; None if disabled or unusable."""
+        root = os.environ.get("OCR_CACHE_DIR", DEFAULT_CACHE_DIR).strip()
+        max_mb = os.environ.get("OCR_CACHE_MAX_MB", str(DEFAULT_CACHE_MAX_MB))
+        if not root or not max_mb.isdigit() or int(max_mb) == 0:
+            return None
+        try:
+            return cls(root, int(max_mb) * 1024 * 1024)
+        except OSError:
+            return None
+
+    def _path(self, *parts):
+        key = hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def get(self, *parts, count=True):
+        """Cached value for the key, or None. count=False skips the stats."""
+        path = self._path(*parts)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            value = None
+        if count:
+            with self._lock:
+                if value is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            inc("ocr_cache_lookups", result="miss" if value is None else "hit")
+        return value
+
+    def put(self, value, *parts):
+        path = self._path(*parts)
+        tmp = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Unique per writer: jobs run as threads of one process, so a
+            # pid-based name could be shared by two writers of one key
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp, path)
+        except OSError:
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                full = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                yield full, st.st_size, st.st_mtime
+
+    def evict(self):
+        """Drop least recently used entries until under max_bytes."""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,123 @@
+import io
+import os
+import threading
+
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    NameObject,
+)
+
+OVERLAY_NAME = NameObject("/PG13Overlay")
+
+
+def _stream(writer, data):
+    s = DecodedStreamObject()
+    s.set_data(data)
+    return writer._add_object(s)
+
+
+def _own_annots(writer, page):
+    """
+    Give a stamped page its own copy of the template's annotations.
+
+    add_page() reuses the objects it cloned for the first copy of the
+    template, but an annotation may only sit on one page (/P). The copies
+    are shallow: appearance streams and field parents stay shared.
+    """
+    annots = page.get("/Annots")
+    if annots is None:
+        return
+    copies = ArrayObject()
+    for ref in annots.get_object():
+        annot = DictionaryObject(ref.get_object())
+        annot[NameObject("/P")] = page.indirect_reference
+        copies.append(writer._add_object(annot))
+    page[NameObject("/Annots")] = copies
+
+
+class PdfTemplate:
+    """
+    A NAVPERS 1070/613 template parsed once and stamped many times.
+
+    Each overlay is attached to a copy of the template's first page as a
+    form XObject, so neither content stream is re-parsed per form. Pages
+    stamped into the same PdfWriter share one copy of the template's
+    fonts, images and content streams.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.reader = PdfReader(io.BytesIO(f.read()))
+        self.path = path
+        self.base = self.reader.pages[0]
+        self.extra_pages = list(self.reader.pages[1:])
+        self._lock = threading.Lock()
+
+    def stamp(self, writer, overlay_pdf, extra_pages=False):
+        """Append the template page with overlay_pdf (bytes) drawn on top."""
+        overlay = PdfReader(io.BytesIO(overlay_pdf)).pages[0]
+
+        # The reader resolves objects lazily from one shared stream.
+        with self._lock:
+            page = writer.add_page(self.base)
+            extras = [writer.add_page(p) for p in self.extra_pages] if extra_pages else []
+        for p in [page] + extras:
+            _own_annots(writer, p)
+
+        form = DecodedStreamObject()
+        form.set_data(overlay.get_contents().get_data())
+        form.update({
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Form"),
+            NameObject("/BBox"): overlay.mediabox,
+            NameObject("/Resources"): overlay["/Resources"].get_object().clone(writer),
+        })
+        form_ref = writer._add_object(form)
+
+        resources = DictionaryObject(page.get("/Resources", DictionaryObject()).get_object())
+        xobjects = DictionaryObject(resources.get("/XObject", DictionaryObject()).get_object())
+        xobjects[OVERLAY_NAME] = form_ref
+        resources[NameObject("/XObject")] = xobjects
+        page[NameObject("/Resources")] = resources
+
+        contents = page.get("/Contents")
+        if contents is None:
+            contents = ArrayObject()
+        elif not isinstance(contents.get_object(), ArrayObject):
+            contents = ArrayObject([contents])
+        else:
+            contents = ArrayObject(contents.get_object())
+
+        page[NameObject("/Contents")] = ArrayObject(
+            [_stream(writer, b"q\n")]
+            + list(contents)
+            + [_stream(writer, b"\nQ\nq " + OVERLAY_NAME.encode() + b" Do Q\n")]
+        )
+        return [page] + extras
+
+    def render(self, overlay_pdf, extra_pages=False):
+        """Single stamped form as PDF bytes."""
+        writer = PdfWriter()
+        self.stamp(writer, overlay_pdf, extra_pages=extra_pages)
+        buf = io.BytesIO()
+        writer.write(buf)
+        return buf.getvalue()
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def load_template(path):
+    """Process-wide PdfTemplate for path, reloaded if the file changes."""
+    key = os.path.abspath(path)
+    mtime = os.path.getmtime(key)
+    with _templates_lock:
+        cached = _templates.get(key)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, PdfTemplate(key))
+            _templates[key] = cached
+        return cached[1]
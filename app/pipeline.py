@@ -0,0 +1,103 @@
+import queue
+import threading
+
+# Items allowed to wait between two stages
+DEFAULT_DEPTH = 2
+
+# How often a blocked stage checks whether the pipeline was stopped
+_POLL = 0.1
+
+_DONE = object()
+
+
+class _Failure:
+    """An exception raised in a stage, passed down to the consumer."""
+
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def _put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL)
+        except queue.Empty:
+            pass
+    return _DONE
+
+
+def _feed(items, outbox, stop):
+    try:
+        for item in items:
+            if not _put(outbox, item, stop):
+                return
+    except BaseException as e:
+        _put(outbox, _Failure(e), stop)
+        return
+    _put(outbox, _DONE, stop)
+
+
+def _work(fn, inbox, outbox, stop):
+    while True:
+        item = _get(inbox, stop)
+        if item is _DONE or isinstance(item, _Failure):
+            _put(outbox, item, stop)
+            return
+        try:
+            result = fn(item)
+        except BaseException as e:
+            _put(outbox, _Failure(e), stop)
+            return
+        if not _put(outbox, result, stop):
+            return
+
+
+def staged(items, *stages, depth=DEFAULT_DEPTH):
+    """
+    Run items through stages, each in its own thread, and yield what the
+    last stage returns, in order.
+
+    Stages are connected by queues holding at most depth items, so a fast
+    stage runs at most depth items ahead of a slow one instead of
+    buffering the whole input. The consumer (the caller's loop) is the
+    final stage. An exception in any stage is re-raised in the consumer;
+    leaving the loop early stops every stage.
+    """
+    if depth < 1:
+        # Queue(maxsize=0) would be unbounded
+        raise ValueError(f"depth must be at least 1, got {depth}")
+
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=depth) for _ in range(len(stages) + 1)]
+
+    threads = [threading.Thread(target=_feed, args=(items, queues[0], stop),
+                                name="stage-feed", daemon=True)]
+    for i, fn in enumerate(stages):
+        name = getattr(fn, "__name__", str(i))
+        threads.append(threading.Thread(target=_work, args=(fn, queues[i], queues[i + 1], stop),
+                                        name=f"stage-{name}", daemon=True))
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
@@ -0,0 +1,162 @@
+import csv
+import os
+import threading
+
+from app.ocr_cache import file_hash
+from app.textnorm import normalize
+
+# Minimum fuzz.ratio (0-100) for an OCR-mangled name to take a rate
+FUZZY_CUTOFF = 88
+
+# Bounded memo of looked-up name -> rate
+MEMO_SIZE = 4096
+
+
+def _clean_header(h: str) -> str:
+    if h is None:
+        return ""
+    return h.lstrip("\ufeff").strip().strip('"').lower()
+
+
+def read_rates_csv(rate_file: str, log):
+    """{"LAST,FIRST": rate} from a roster CSV with last/first/rate columns."""
+    rates = {}
+
+    with open(rate_file, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        if not reader.fieldnames:
+            log("[RATES] No header row detected.")
+            return rates
+
+        reader.fieldnames = [_clean_header(h) for h in reader.fieldnames]
+
+        for raw_row in reader:
+            row = {}
+            for k, v in raw_row.items():
+                key = _clean_header(k)
+                if not key:
+                    continue
+                row[key] = (v or "").strip()
+
+            last = row.get("last", "").upper()
+            first = row.get("first", "").upper()
+            rate = row.get("rate", "").upper()
+
+            if not last or not rate:
+                continue
+
+            rates[f"{last},{first}"] = rate
+
+    return rates
+
+
+class RateDirectory:
+    """
+    Rate lookups over one roster CSV, indexed once.
+
+    lookup(name) tries, in order:
+      1. the exact "LAST,FIRST" key,
+      2. the first roster entry with the same last name (a dict hit on the
+         last-name index, same answer as the old startswith scan),
+      3. the closest "LAST FIRST" in the roster by fuzz.ratio, for names
+         OCR got slightly wrong, if it scores at least FUZZY_CUTOFF.
+    """
+
+    def __init__(self, rates, fuzzy_cutoff=FUZZY_CUTOFF):
+        self.rates = rates
+        self.fuzzy_cutoff = fuzzy_cutoff
+
+        self.by_last = {}
+        for key, rate in rates.items():
+            self.by_last.setdefault(key.partition(",")[0], rate)
+
+        # Prebuilt fuzzy candidates: normalized "LAST FIRST" per entry
+        self._keys = list(rates)
+        self._choices = [
+            " ".join(filter(None, (normalize(last), normalize(first))))
+            for last, _, first in (k.partition(",") for k in self._keys)
+        ]
+
+        self._memo = {}
+        self._memo_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rates)
+
+    def _lookup(self, name):
+        parts = normalize(name).split()
+        if len(parts) < 2:
+            return ""
+
+        first = parts[0]
+        last = parts[-1]
+
+        rate = self.rates.get(f"{last},{first}")
+        if rate is not None:
+            return rate
+
+        rate = self.by_last.get(last)
+        if rate is not None:
+            return rate
+
+        if not self._choices:
+            return ""
+        from rapidfuzz import fuzz, process
+        hit = process.extractOne(
+            f"{last} {first}", self._choices,
+            scorer=fuzz.ratio, score_cutoff=self.fuzzy_cutoff,
+        )
+        return self.rates[self._keys[hit[2]]] if hit else ""
+
+    def lookup(self, name):
+        """Rate for a member name as read off the sheet ("FIRST ... LAST")."""
+        with self._memo_lock:
+            rate = self._memo.get(name)
+        if rate is None:
+            rate = self._lookup(name)
+            with self._memo_lock:
+                if len(self._memo) >= MEMO_SIZE:
+                    self._memo.clear()
+                self._memo[name] = rate
+        return rate
+
+
+_directories = {}
+_directories_lock = threading.Lock()
+
+
+def load_rate_directory(rate_file: str, log):
+    """
+    RateDirectory for rate_file, parsed once per file version.
+
+    The cache is keyed on the path; an entry is reused while the file's
+    mtime and size are unchanged, and re-validated by content hash when
+    they are not (so a touch or a re-copied identical roster does not
+    trigger a re-parse).
+    """
+    if not os.path.exists(rate_file):
+        log(f"[RATES] CSV not found: {rate_file}")
+        return RateDirectory({})
+
+    key = os.path.abspath(rate_file)
+    st = os.stat(key)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with _directories_lock:
+        cached = _directories.get(key)
+    if cached is not None and cached[0] == stamp:
+        log(f"[RATES] Using cached {rate_file} ({len(cached[2])} entries)")
+        return cached[2]
+
+    digest = file_hash(key)
+    if cached is not None and cached[1] == digest:
+        directory = cached[2]
+        log(f"[RATES] {rate_file} touched but unchanged ({len(directory)} entries)")
+    else:
+        log(f"[RATES] Loading from {rate_file}")
+        directory = RateDirectory(read_rates_csv(key, log))
+        log(f"[RATES] Loaded {len(directory)} entries.")
+
+    with _directories_lock:
+        _directories[key] = (stamp, digest, directory)
+    return directory
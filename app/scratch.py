@@ -0,0 +1,122 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+log = logging.getLogger(__name__)
+
+SESSION_PREFIX = "req-"
+
+# How often open_session() may trigger a TTL sweep
+SWEEP_INTERVAL = 60
+
+
+class ScratchFull(RuntimeError):
+    """Raised when a request would push scratch usage past the quota."""
+
+
+class ScratchSession:
+    """One request's private scratch directory; release() removes it."""
+
+    def __init__(self, space, path, reserved):
+        self.space = space
+        self.path = path
+        self.reserved = reserved
+        self._released = False
+
+    def spool(self, max_memory):
+        """
+        Temp file for an upload: kept in memory up to max_memory bytes,
+        then rolled over to an unnamed file in this session's directory.
+        """
+        return tempfile.SpooledTemporaryFile(max_size=max_memory, dir=self.path)
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.space._unreserve(self.reserved)
+
+
+class ScratchSpace:
+    """
+    Bounded scratch area for request data (uploaded PDFs that do not fit
+    in memory).
+
+    Every request that needs disk gets its own directory under root and
+    reserves its expected size up front; reservations beyond quota_bytes
+    are refused with ScratchFull. Directories are removed when the request
+    ends, and any left behind by a crash are swept once they are older
+    than ttl_seconds.
+    """
+
+    def __init__(self, root, quota_bytes, ttl_seconds):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.ttl_seconds = ttl_seconds
+        self._reserved = 0
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        os.makedirs(root, exist_ok=True)
+
+    @property
+    def reserved(self):
+        with self._lock:
+            return self._reserved
+
+    def open_session(self, size=0):
+        """New per-request directory with size bytes reserved against the quota."""
+        self._maybe_sweep()
+        size = max(0, size or 0)
+        with self._lock:
+            if self._reserved + size > self.quota_bytes:
+                raise ScratchFull(
+                    f"scratch quota exceeded ({self._reserved + size} > {self.quota_bytes} bytes)"
+                )
+            self._reserved += size
+
+        path = os.path.join(self.root, f"{SESSION_PREFIX}{uuid.uuid4().hex}")
+        try:
+            os.makedirs(path)
+        except OSError:
+            self._unreserve(size)
+            raise
+        return ScratchSession(self, path, size)
+
+    def _unreserve(self, size):
+        with self._lock:
+            self._reserved = max(0, self._reserved - size)
+
+    def _maybe_sweep(self):
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+        self.sweep(now)
+
+    def sweep(self, now=None):
+        """Remove session directories older than the TTL; returns how many."""
+        now = now or time.time()
+        removed = 0
+        try:
+            entries = list(os.scandir(self.root))
+        except OSError:
+            return 0
+        for entry in entries:
+            if not entry.name.startswith(SESSION_PREFIX):
+                continue
+            try:
+                age = now - entry.stat().st_mtime
+            except OSError:
+                continue
+            if age > self.ttl_seconds:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        if removed:
+            log.info("Swept %d abandoned scratch dirs from %s", removed, self.root)
+        return removed
@@ -0,0 +1,106 @@
+import string
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from operator import itemgetter
+
+# normalize() leaves only these characters in a ship key or OCR window
+ALPHABET = string.ascii_uppercase + " "
+
+
+def _length_ratio(la, lb):
+    # Same arithmetic as SequenceMatcher.real_quick_ratio()
+    return 2.0 * min(la, lb) / (la + lb) if la + lb else 1.0
+
+
+def _char_counts(text):
+    """Per-letter counts over ALPHABET, or None if text has other chars."""
+    counts = tuple(text.count(ch) for ch in ALPHABET)
+    return counts if sum(counts) == len(text) else None
+
+
+def _picker(indexes):
+    """itemgetter that always returns a tuple, even for one index."""
+    if len(indexes) == 1:
+        i = indexes[0]
+        return lambda seq: (seq[i],)
+    return itemgetter(*indexes)
+
+
+class ShipIndex:
+    """
+    Precompiled lookup over normalized ship names.
+
+    Gives exactly the answers of difflib.get_close_matches(chunk, keys,
+    n=1, cutoff) over every word window of a line, longest first, but:
+
+    - an exact hash lookup short-circuits windows that are a ship name,
+    - keys are bucketed by length, and only buckets whose length ratio can
+      still reach the cutoff are scored (difflib's own first filter, done
+      once per bucket instead of once per key),
+    - difflib's second filter (quick_ratio, a multiset intersection) runs
+      on precomputed letter-count vectors instead of fresh dicts,
+    - per-window results are memoized, since OCR lines repeat the same
+      few ship names over and over.
+    """
+
+    def __init__(self, normalized, cutoff=0.75, memo_size=65536):
+        self.normalized = normalized
+        self.cutoff = cutoff
+
+        self._by_length = OrderedDict()
+        self._counts = {}
+        for key in normalized:
+            self._by_length.setdefault(len(key), []).append(key)
+            self._counts[key] = _char_counts(key)
+
+        self.lookup = lru_cache(maxsize=memo_size)(self._lookup)
+
+    def candidates(self, chunk):
+        """Keys whose length alone does not rule them out for chunk."""
+        la = len(chunk)
+        out = []
+        for lb, keys in self._by_length.items():
+            if _length_ratio(la, lb) >= self.cutoff:
+                out.extend(keys)
+        return out
+
+    def _lookup(self, chunk):
+        """Best key for one word window, or None (get_close_matches n=1)."""
+        if chunk in self.normalized:
+            return chunk
+
+        s = SequenceMatcher()
+        s.set_seq2(chunk)
+        counts = _char_counts(chunk)
+        if counts is not None:
+            # Only letters present in the chunk can contribute to a match
+            pick = _picker([i for i, n in enumerate(counts) if n])
+            counts = pick(counts)
+        best = None
+        for key in self.candidates(chunk):
+            key_counts = self._counts[key]
+            if counts is not None and key_counts is not None:
+                # Same value SequenceMatcher.quick_ratio() would compute
+                common = sum(map(min, counts, pick(key_counts)))
+                if 2.0 * common / (len(chunk) + len(key)) < self.cutoff:
+                    continue
+                s.set_seq1(key)
+            else:
+                s.set_seq1(key)
+                if s.quick_ratio() < self.cutoff:
+                    continue
+            score = (s.ratio(), key)
+            if score[0] >= self.cutoff and (best is None or score > best):
+                best = score
+        return best[1] if best else None
+
+    def match(self, candidate):
+        """Ship for an already-normalized line, trying longest windows first."""
+        words = candidate.split()
+        for size in range(len(words), 0, -1):
+            for i in range(len(words) - size + 1):
+                key = self.lookup(" ".join(words[i:i + size]))
+                if key is not None:
+                    return self.normalized[key]
+        return None
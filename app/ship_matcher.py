@@ -1,46 +1,55 @@
-import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
 from rapidfuzz import fuzz, process
 
-VALID_SHIPS = [
-    "USS America", "USS Anchorage", "USS Arleigh Burke", "USS Arlington",
-    "USS Ashland", "USS Augusta", "USS Bainbridge", "USS Barry", "USS Bataan",
-    "USS Beloit", "USS Benfold", "USS Billings", "USS Blue Ridge", "USS Boxer",
-    "USS Bulkeley", "USS Canberra", "USS Cape St. George", "USS Carl M. Levin",
-    "USS Carney", "USS Carter Hall", "USS Chafee", "USS Charleston",
-    "USS Chief", "USS Chosin", "USS Chung-Hoon", "USS Cincinnati",
-    "USS Cole", "USS Comstock", "USS Cooperstown", "USS Curtis Wilbur",
-    "USS Daniel Inouye", "USS Decatur", "USS Delbert D. Black", "USS Dewey",
-    "USS Donald Cook", "USS Essex", "USS Farragut", "USS Fitzgerald",
-    "USS Forrest Sherman", "USS Fort Lauderdale", "USS Fort Worth",
-    "USS Frank E. Petersen Jr.", "USS Gabrielle Giffords", "USS Germantown",
-    "USS Gettysburg", "USS Gonzalez", "USS Gravely", "USS Green Bay",
-    "USS Gridley", "USS Gunston Hall", "USS Halsey", "USS Harpers Ferry",
-    "USS Higgins", "USS Hopper", "USS Howard", "USS Indianapolis", "USS Iwo Jima",
-    "USS Jackson", "USS Jack H. Lucas", "USS James E. Williams",
-    "USS Jason Dunham", "USS John Basilone", "USS John Finn",
-    "USS John P. Murtha", "USS John Paul Jones", "USS John S. McCain",
-    "USS Kansas City", "USS Kearsarge", "USS Kidd", "USS Kingsville",
-    "USS Laboon", "USS Lake Erie", "USS Lassen", "USS Lenah Sutcliffe Higbee",
-    "USS Mahan", "USS Makin Island", "USS Manchester", "USS Marinette",
-    "USS Mason", "USS McCampbell", "USS McFaul", "USS Mesa Verde",
-    "USS Michael Monsoor", "USS Michael Murphy", "USS Milius",
-    "USS Minneapolis–Saint Paul", "USS Mitscher", "USS Mobile", "USS Momsen",
-    "USS Montgomery", "USS Mount Whitney", "USS Mustin", "USS Nantucket",
-    "USS New Orleans", "USS New York", "USS Nitze", "USS O’Kane",
-    "USS Oak Hill", "USS Oakland", "USS Omaha", "USS Oscar Austin",
-    "USS Patriot", "USS Paul Hamilton", "USS Paul Ignatius",
-    "USS Pearl Harbor", "USS Pinckney", "USS Pioneer", "USS Porter",
-    "USS Portland", "USS Preble", "USS Princeton", "USS Rafael Peralta",
-    "USS Ralph Johnson", "USS Ramage", "USS Richard M. McCool Jr.",
-    "USS Robert Smalls", "USS Roosevelt", "USS Ross", "USS Rushmore",
-    "USS Russell", "USS Sampson", "USS San Antonio", "USS San Diego",
-    "USS Santa Barbara", "USS Savannah", "USS Shiloh", "USS Shoup",
-    "USS Somerset", "USS Spruance", "USS St. Louis", "USS Sterett",
-    "USS Stethem", "USS Stockdale", "USS Stout", "USS The Sullivans",
-    "USS Tortuga", "USS Tripoli", "USS Truxtun", "USS Tulsa", "USS Warrior",
-    "USS Wasp", "USS Wayne E. Meyer", "USS William P. Lawrence",
-    "USS Winston S. Churchill", "USS Wichita", "USS Zumwalt"
-]
+from app.ship_registry import get_registry
+from app.textnorm import clean_raw, clean_raw_all
+
+REGISTRY = get_registry()
+
+# Canonical names, as before; matching also covers every alias
+VALID_SHIPS = [f"USS {name}" for name in REGISTRY.names]
+
+# Fuzzy score below which the cleaned input is returned as-is
+MIN_SCORE = 60
+
+# Bounded memo of cleaned string -> resolved ship
+MEMO_SIZE = 4096
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _sort_tokens(s):
+    return " ".join(sorted(s.split()))
+
+
+# token_sort_ratio(a, b) is ratio() over the sorted tokens of each side;
+# the registry index ships the choices already sorted.
+_SORTED_SHIPS = REGISTRY.sorted_choices
+
+
+def _resolve(cleaned, idx, score):
+    if score < MIN_SCORE:
+        return cleaned  # fallback
+    return REGISTRY.official_name(idx)
+
+
+def _remember(cleaned, ship):
+    with _memo_lock:
+        _memo[cleaned] = ship
+        _memo.move_to_end(cleaned)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+
+
+def _recall(cleaned):
+    with _memo_lock:
+        ship = _memo.get(cleaned)
+        if ship is not None:
+            _memo.move_to_end(cleaned)
+        return ship
 
 
 def match_ship(raw):
@@ -48,19 +57,61 @@ def match_ship(raw):
     if not raw:
         return ""
 
-    cleaned = raw.upper()
-    cleaned = re.sub(r"\(.*?\)", " ", cleaned)      # remove "(ASW C)"
-    cleaned = re.sub(r"[^A-Z\s]", " ", cleaned)     # remove numbers/symbols
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    cleaned = clean_raw(raw)
+    ship = _recall(cleaned)
+    if ship is not None:
+        return ship
 
-    match, score, _ = process.extractOne(
-        cleaned,
-        VALID_SHIPS,
-        scorer=fuzz.token_sort_ratio
+    _, score, idx = process.extractOne(
+        _sort_tokens(cleaned),
+        _SORTED_SHIPS,
+        scorer=fuzz.ratio
     )
 
-    if score < 60:
-        return cleaned  # fallback
+    ship = _resolve(cleaned, idx, score)
+    _remember(cleaned, ship)
+    return ship
+
+
+def match_ships(raws):
+    """
+    Resolve a list of raw ship strings in one pass.
+
+    Inputs are cleaned and de-duplicated, anything not already memoized
+    is scored against every ship with a single process.cdist call, and
+    the results come back in input order (same answers as match_ship).
+    """
+    present = [r for r in raws if r]
+    it = iter(clean_raw_all(present))
+    cleaned = [next(it) if r else None for r in raws]
+
+    todo = []
+    seen = set()
+    for c in cleaned:
+        if c is not None and c not in seen and _recall(c) is None:
+            todo.append(c)
+            seen.add(c)
 
-    return match
+    if todo:
+        # float64 like extractOne's scores; cdist's default float32 can
+        # round a score just under MIN_SCORE up onto it
+        scores = process.cdist(
+            [_sort_tokens(c) for c in todo],
+            _SORTED_SHIPS,
+            scorer=fuzz.ratio,
+            dtype=np.float64,
+        )
+        best = scores.argmax(axis=1)
+        for c, row, idx in zip(todo, scores, best):
+            _remember(c, _resolve(c, int(idx), row[idx]))
 
+    out = []
+    for c in cleaned:
+        if c is None:
+            out.append("")
+            continue
+        ship = _recall(c)
+        if ship is None:  # evicted mid-batch by a very large list
+            ship = match_ship(c)
+        out.append(ship)
+    return out
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+
+from app.textnorm import normalize
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+REGISTRY_PATH = os.path.join(DATA_DIR, "ships.json")
+INDEX_PATH = os.path.join(DATA_DIR, "ships.index.json")
+
+# Bump when the layout of the compiled index changes
+INDEX_VERSION = 1
+
+Ship = namedtuple("Ship", ["name", "hull", "ship_class", "aliases"])
+
+
+def _hull_key(hull):
+    return re.sub(r"[\s-]", "", hull.upper())
+
+
+def _sort_tokens(s):
+    return " ".join(sorted(s.split()))
+
+
+def compile_index(ships, source_hash):
+    """
+    Everything the matchers need, precomputed from the registry.
+
+    normalized:     normalize(name or alias) -> canonical name, uppercased
+    choices:        "USS <normalized key>" for fuzzy matching
+    sorted_choices: the same with tokens sorted (token_sort_ratio input)
+    choice_ship:    index into ships for every choice
+    hulls:          hull number without separators -> index into ships
+    """
+    normalized = {}
+    key_ship = {}
+    hulls = {}
+    for i, ship in enumerate(ships):
+        if ship.hull:
+            hulls[_hull_key(ship.hull)] = i
+        for spelling in [ship.name] + list(ship.aliases):
+            key = normalize(spelling)
+            if key not in normalized:
+                normalized[key] = ship.name.upper()
+                key_ship[key] = i
+
+    choices = [f"USS {key}" for key in normalized]
+    return {
+        "version": INDEX_VERSION,
+        "source_hash": source_hash,
+        "normalized": normalized,
+        "choices": choices,
+        "sorted_choices": [_sort_tokens(c) for c in choices],
+        "choice_ship": [key_ship[key] for key in normalized],
+        "hulls": hulls,
+    }
+
+
+def read_registry(path=REGISTRY_PATH):
+    """Ships from the registry file, plus the file's content hash."""
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    ships = [
+        Ship(e["name"], e.get("hull", ""), e.get("class", ""),
+             tuple(e.get("aliases", ())))
+        for e in json.loads(raw.decode("utf-8"))
+    ]
+    return ships, hashlib.sha256(raw).hexdigest()
+
+
+class ShipRegistry:
+    """
+    Single source of truth for ship names.
+
+    app/data/ships.json lists every ship once with its hull number, class
+    and alternate spellings. Both matchers (app.py's difflib window scan
+    and app/ship_matcher.py's rapidfuzz lookup) take their keys from the
+    compiled index, which is serialized to app/data/ships.index.json and
+    only rebuilt when the registry file changes.
+
+    Rebuild the index by hand with:  python -m app.ship_registry
+    """
+
+    def __init__(self, ships, index):
+        self.ships = ships
+        self.index = index
+        self.names = [s.name for s in ships]
+        self.normalized = index["normalized"]
+        self.choices = index["choices"]
+        self.sorted_choices = index["sorted_choices"]
+        self.choice_ship = index["choice_ship"]
+
+    @classmethod
+    def load(cls, path=REGISTRY_PATH, index_path=INDEX_PATH):
+        ships, source_hash = read_registry(path)
+
+        index = None
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        if (not index or index.get("version") != INDEX_VERSION
+                or index.get("source_hash") != source_hash):
+            index = compile_index(ships, source_hash)
+            try:
+                write_index(index, index_path)
+            except OSError:
+                pass  # read-only install: use the in-memory index
+
+        return cls(ships, index)
+
+    def official_name(self, choice_idx):
+        """Canonical "USS <name>" for a position in choices."""
+        return f"USS {self.ships[self.choice_ship[choice_idx]].name}"
+
+    def by_hull(self, hull):
+        """Ship for a hull number such as "DDG-65" or "ddg 65", or None."""
+        i = self.index["hulls"].get(_hull_key(hull))
+        return None if i is None else self.ships[i]
+
+
+def write_index(index, index_path=INDEX_PATH):
+    tmp = index_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=0)
+    os.replace(tmp, index_path)
+
+
+_registry = None
+
+
+def get_registry():
+    """Process-wide registry, loaded on first use."""
+    global _registry
+    if _registry is None:
+        _registry = ShipRegistry.load()
+    return _registry
+
+
+if __name__ == "__main__":
+    ships, source_hash = read_registry()
+    index = compile_index(ships, source_hash)
+    write_index(index)
+    print(f"Wrote {INDEX_PATH}: {len(ships)} ships, {len(index['choices'])} spellings")
@@ -0,0 +1,83 @@
+import re
+
+# Row separator for the bulk functions. The patterns below never match
+# across it, so cleaning "a\0b\0c" in one pass and splitting on it gives
+# the same strings as cleaning a, b and c one by one. (Text never has a
+# NUL in it; if it does, the bulk functions fall back to row by row.)
+SEP = "\x00"
+
+_PARENS = re.compile(r"\([^\n\x00]*?\)")              # "(ASW C)"
+_USS = re.compile(r"\bUSS\b", re.I)
+_CLOCK = re.compile(r"\b[0-2]?\d[0-5]\d\b")
+# Runs of anything that ends up as a single space. Digits, hyphens and
+# whitespace collapse together, so "1630" times need no pass of their own.
+_JUNK_RUN = re.compile(r"[\d\-\s]+")
+_NON_LETTER_RUN = re.compile(r"[^A-Z\x00]+")
+_NOT_KEY = re.compile(r"[^A-Z \x00]+")
+
+
+def strip_times(text: str) -> str:
+    """Drop 3-4 digit clock times ("0800", "2359") from OCR text."""
+    return _CLOCK.sub("", text)
+
+
+def normalize(text: str) -> str:
+    """Uppercase letters and single spaces only, "(...)" tags removed."""
+    text = _NOT_KEY.sub("", _PARENS.sub("", text).upper())
+    return " ".join(text.split())
+
+
+def clean_ship_name(raw):
+    """Remove junk and return a clean uppercase ship name."""
+    if not raw:
+        return ""
+    return _clean_ship_name(raw).strip()
+
+
+def clean_raw(raw):
+    """Uppercase, drop "(...)" tags and anything that is not a letter."""
+    return _clean_raw(raw).strip()
+
+
+def _clean_ship_name(r):
+    r = r.replace("þ", " ")
+    r = _PARENS.sub(" ", r)             # remove (ASW ...)
+    r = _USS.sub(" ", r)                # remove USS prefix
+    r = _JUNK_RUN.sub(" ", r)           # times, digits, hyphens, spaces
+    return r.upper()
+
+
+def _clean_raw(r):
+    r = _PARENS.sub(" ", r.upper())     # remove "(ASW C)"
+    return _NON_LETTER_RUN.sub(" ", r)  # numbers/symbols, collapse spaces
+
+
+# ------------------------------------------------
+# BULK: one regex pass per page instead of per row
+# ------------------------------------------------
+def _bulk(fn, texts):
+    if any(SEP in t for t in texts):
+        return [fn(t) for t in texts]
+    return fn(SEP.join(texts)).split(SEP)
+
+
+def normalize_all(texts):
+    """normalize() over a list of strings, in one pass."""
+    if not texts:
+        return []
+    return [" ".join(t.split()) for t in _bulk(
+        lambda s: _NOT_KEY.sub("", _PARENS.sub("", s).upper()), texts)]
+
+
+def clean_ship_names(raws):
+    """clean_ship_name() over a list of strings (None/"" give "")."""
+    if not raws:
+        return []
+    return [s.strip() for s in _bulk(_clean_ship_name, [r or "" for r in raws])]
+
+
+def clean_raw_all(raws):
+    """clean_raw() over a list of strings, in one pass."""
+    if not raws:
+        return []
+    return [s.strip() for s in _bulk(_clean_raw, raws)]
@@ -0,0 +1,67 @@
+import gc
+import importlib
+import logging
+import os
+import time
+
+from app.config import PG13_TEMPLATE_PATH
+
+log = logging.getLogger(__name__)
+
+# Imported up front so forked workers inherit them instead of each paying
+# the import on its first request
+HEAVY_MODULES = (
+    "PyPDF2",
+    "pdfplumber",
+    "reportlab.pdfgen.canvas",
+    "rapidfuzz.process",
+    "pytesseract",
+    "pdf2image",
+    "app.extractor",
+    "app.generator",
+    "app.ship_matcher",
+)
+
+
+def _step(timings, name, fn, *args):
+    t0 = time.perf_counter()
+    try:
+        fn(*args)
+    except Exception as e:
+        log.warning("Warm-up %s failed: %s", name, e)
+        return
+    timings[name] = time.perf_counter() - t0
+
+
+def warm_caches(template_paths=(PG13_TEMPLATE_PATH,)):
+    """
+    Load everything a request would otherwise load lazily: the heavy PDF /
+    OCR modules (the apps import them on first use), the generator's TTF
+    font, the ship registry and matcher index, and the parsed PDF
+    templates.
+
+    Meant for a preforking server's master process (gunicorn with
+    preload_app): done once before fork, the workers share it all
+    copy-on-write. Missing templates or optional modules are logged and
+    skipped. Returns {step: seconds}.
+    """
+    timings = {}
+    for name in HEAVY_MODULES:
+        _step(timings, name, importlib.import_module, name)
+
+    from app.generator import register_fonts
+    from app.pdf_template import load_template
+    from app.ship_registry import get_registry
+
+    _step(timings, "fonts", register_fonts)
+    _step(timings, "ship_registry", get_registry)
+    for path in template_paths:
+        if path and os.path.exists(path):
+            _step(timings, f"template {path}", load_template, path)
+
+    # Move what is loaded so far out of the collector's generations, so
+    # collections in the workers do not touch (and un-share) those pages
+    gc.freeze()
+
+    log.info("Warm-up done in %.2fs (%d steps)", sum(timings.values()), len(timings))
+    return timings
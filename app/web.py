@@ -1,10 +1,50 @@
+import itertools
+import logging
 import os
-import tempfile
-from flask import Flask, render_template, request, redirect, url_for, send_file, flash
+from flask import (
+    Flask, Request, Response, render_template, request, redirect, url_for,
+    flash, stream_with_context, current_app,
+)
+from werkzeug.exceptions import ServiceUnavailable, RequestEntityTooLarge
+from werkzeug.utils import secure_filename
 
-from app.extractor import extract_sailors_and_events
-from app.generator import generate_pg13_zip
-from app.config import SECRET_KEY
+from app.config import (
+    SECRET_KEY, MAX_UPLOAD_MB, UPLOAD_SPOOL_KB,
+    SCRATCH_DIR, SCRATCH_QUOTA_MB, SCRATCH_TTL_MINUTES,
+)
+from app.logs import configure_logging
+from app.metrics import CONTENT_TYPE, METRICS, inc
+from app.scratch import ScratchFull, ScratchSpace
+
+log = logging.getLogger(__name__)
+
+
+class UploadRequest(Request):
+    """
+    Request whose file uploads spool into the app's scratch area.
+
+    Werkzeug's default puts every upload over 500 KB in an unmanaged
+    temp file. Here an upload stays in memory up to UPLOAD_SPOOL_KB and
+    then rolls over into a per-request scratch directory that counts
+    against the quota and is removed when the request ends.
+    """
+
+    scratch_session = None
+
+    def _get_file_stream(self, total_content_length, content_type,
+                         filename=None, content_length=None):
+        if self.scratch_session is None:
+            # A chunked upload has no length up front; charge the most it
+            # may grow to before MAX_CONTENT_LENGTH cuts it off
+            if total_content_length is None:
+                total_content_length = MAX_UPLOAD_MB * 1024 * 1024
+            try:
+                self.scratch_session = current_app.extensions["scratch"].open_session(
+                    total_content_length
+                )
+            except ScratchFull as e:
+                raise ServiceUnavailable(str(e))
+        return self.scratch_session.spool(UPLOAD_SPOOL_KB * 1024)
 
 
 def create_app():
@@ -12,69 +52,106 @@ def create_app():
     PG-13 Sea Pay Processor Flask Application Factory
     """
 
+    configure_logging()
+
     template_dir = os.path.join(os.path.dirname(__file__), "templates_web")
     app = Flask(__name__, template_folder=template_dir)
+    app.request_class = UploadRequest
 
     app.config["SECRET_KEY"] = SECRET_KEY
+    app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_MB * 1024 * 1024
+
+    scratch = ScratchSpace(SCRATCH_DIR, SCRATCH_QUOTA_MB * 1024 * 1024,
+                           SCRATCH_TTL_MINUTES * 60)
+    scratch.sweep()
+    app.extensions["scratch"] = scratch
+
+    @app.teardown_request
+    def release_scratch(exc):
+        # Runs after a streamed response has finished, too
+        session = getattr(request, "scratch_session", None)
+        if session is not None:
+            session.release()
+
+    @app.errorhandler(RequestEntityTooLarge)
+    def upload_too_large(e):
+        log.warning("Upload rejected: over %d MB", MAX_UPLOAD_MB)
+        flash(f"Upload too large (limit {MAX_UPLOAD_MB} MB).")
+        return redirect(url_for("index"))
+
+    @app.errorhandler(ServiceUnavailable)
+    def scratch_full(e):
+        log.warning("Upload rejected: %s", e.description)
+        flash("Server is busy with other uploads; try again shortly.")
+        return redirect(url_for("index"))
 
     @app.route("/", methods=["GET", "POST"])
     def index():
 
-        print("DEBUG: request.method =", request.method)
+        log.debug("request.method = %s", request.method)
 
         if request.method == "POST":
 
-            print("DEBUG: request.files keys =", list(request.files.keys()))
+            log.debug("request.files keys = %s", list(request.files.keys()))
 
             if "pdf_file" not in request.files:
-                print("ERROR: pdf_file not in request.files")
+                log.warning("Upload rejected: pdf_file not in request.files")
                 flash("Upload failed: backend did not receive file.")
                 return redirect(url_for("index"))
 
             file = request.files["pdf_file"]
-            print("DEBUG: file object =", file)
-            print("DEBUG: filename =", file.filename)
+            log.debug("file object = %s, filename = %s", file, file.filename)
 
             if not file:
-                print("ERROR: file is None")
+                log.warning("Upload rejected: file is None")
                 flash("File missing.")
                 return redirect(url_for("index"))
 
             if file.filename == "":
-                print("ERROR: Empty filename")
+                log.warning("Upload rejected: empty filename")
                 flash("Please select a PDF file.")
                 return redirect(url_for("index"))
 
             if not file.filename.lower().endswith(".pdf"):
-                print("ERROR: Not a PDF")
+                log.warning("Upload rejected: not a PDF (%s)", file.filename)
                 flash("Only PDF files are accepted.")
                 return redirect(url_for("index"))
 
-            # Save uploaded file
-            temp_dir = tempfile.mkdtemp()
-            pdf_path = os.path.join(temp_dir, file.filename)
-            file.save(pdf_path)
+            inc("uploads")
+
+            # Imported here so starting the app (and /health) does not
+            # load pdfplumber, reportlab and PyPDF2
+            from app.extractor import iter_sailors
+            from app.generator import iter_command_zip
 
-            print("DEBUG: Saved PDF to", pdf_path)
+            # Parse straight from the upload stream (memory, or its spool
+            # file in the scratch area); nothing is copied to disk
+            sailors = iter_sailors(file.stream)
 
-            sailors = extract_sailors_and_events(pdf_path)
-            print("DEBUG: Extracted sailors =", sailors)
+            # Peek at the first sailor so an empty sheet can still redirect
+            first = next(sailors, None)
 
-            if not sailors:
-                print("ERROR: No sailors found")
+            if not first:
+                log.warning("No sailors found in %s", file.filename)
                 flash("No valid sailors or events found in PDF.")
                 return redirect(url_for("index"))
 
-            sailor = sailors[0]
-            print("DEBUG: Processing sailor:", sailor)
-
-            zip_path = generate_pg13_zip(sailor, output_dir=temp_dir)
-            print("DEBUG: Generated ZIP:", zip_path)
-
-            return send_file(
-                zip_path,
-                as_attachment=True,
-                download_name=os.path.basename(zip_path)
+            log.debug("First sailor %s, %d ships", first["name"], len(first["events"]))
+
+            # Stream one ZIP (a folder per sailor) while the rest of the
+            # sheet is still being parsed and PG-13s are generated
+            stem = secure_filename(os.path.splitext(file.filename)[0]) or "PG13"
+            download_name = f"{stem}_PG13.zip"
+            log.info("Upload %s: streaming %s", file.filename, download_name)
+
+            return Response(
+                stream_with_context(
+                    iter_command_zip(itertools.chain([first], sailors))
+                ),
+                mimetype="application/zip",
+                headers={
+                    "Content-Disposition": f'attachment; filename="{download_name}"'
+                },
             )
 
         return render_template("index.html")
@@ -83,6 +160,10 @@ def create_app():
     def health():
         return {"status": "ok"}, 200
 
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(METRICS.render(), content_type=CONTENT_TYPE)
+
     return app
 
 
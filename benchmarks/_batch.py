@@ -0,0 +1,22 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.loader import load_batch_app  # noqa: E402,F401
+
+
+def best_of(fn, repeat=5):
+    """Fastest wall time of fn() over repeat runs, in seconds."""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
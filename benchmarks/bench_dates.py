@@ -0,0 +1,175 @@
+"""
+Microbenchmark: date handling, strptime (as before app/dates.py) vs. the
+compiled-pattern, int-built, memoized parsers.
+
+Over a seeded set of table rows (realistic repetition, the odd bad date):
+
+    parse_date   extractor cells, "M/D/YYYY" / "M/D/YY"
+    rows+group   parse_rows' M/D[/Y] prefixes grouped into ship periods
+                 (strings re-parsed with strptime vs. date objects)
+
+Checks both variants agree on every row, then reports the per-row cost,
+with the memo cleared before each run (cold) and left warm.
+
+    python benchmarks/bench_dates.py [--rows 100000] [--per-sheet 60] [--seed 7]
+"""
+import argparse
+import datetime
+import random
+from datetime import timedelta
+
+from _batch import best_of, load_batch_app
+
+from app import dates
+from app.extractor import parse_date
+
+SHIPS = ["NIMITZ", "PRINCETON", "SAMPSON", "ESSEX", "ANCHORAGE", "JOHN FINN"]
+
+
+# Date handling as it was before app/dates.py
+def legacy_parse_date(s):
+    if not s:
+        return None
+    for fmt in ("%m/%d/%Y", "%m/%d/%y"):
+        try:
+            return datetime.datetime.strptime(s.strip(), fmt).date()
+        except ValueError:
+            pass
+    return None
+
+
+def legacy_row_date(mm, dd, yy, year):
+    y = ("20" + yy) if (yy and len(yy) == 2) else (yy if yy else year)
+    return f"{mm.zfill(2)}/{dd.zfill(2)}/{y}"
+
+
+def legacy_group_by_ship(rows):
+    groups = {}
+    for r in rows:
+        dt = datetime.datetime.strptime(r["date"], "%m/%d/%Y")
+        groups.setdefault(r["ship"], []).append(dt)
+
+    results = []
+    for ship, days in groups.items():
+        days = sorted(set(days))
+        start = prev = days[0]
+        for day in days[1:]:
+            if day == prev + timedelta(days=1):
+                prev = day
+            else:
+                results.append({"ship": ship, "start": start.strftime("%m/%d/%Y"),
+                                "end": prev.strftime("%m/%d/%Y")})
+                start = prev = day
+        results.append({"ship": ship, "start": start.strftime("%m/%d/%Y"),
+                        "end": prev.strftime("%m/%d/%Y")})
+    return results
+
+
+def make_rows(count, seed):
+    """(cell text, (mm, dd, yy), ship) per row: consecutive days, a few bad cells."""
+    rng = random.Random(seed)
+    day = datetime.date(2023, 1, 1)
+    rows = []
+    while len(rows) < count:
+        ship = rng.choice(SHIPS)
+        for _ in range(rng.randint(2, 8)):
+            style = rng.random()
+            if style < 0.01:
+                parts = (str(rng.randint(13, 19)), "1", "2024")     # not a date
+            elif style < 0.3:
+                parts = (f"{day.month:02d}", f"{day.day:02d}", str(day.year))
+            elif style < 0.5:
+                parts = (str(day.month), str(day.day), str(day.year)[2:])
+            elif style < 0.7:
+                parts = (str(day.month), str(day.day), None)
+            else:
+                parts = (str(day.month), str(day.day), str(day.year))
+            mm, dd, yy = parts
+            rows.append((f"{mm}/{dd}/{yy or day.year}", parts, ship))
+            day += timedelta(days=1)
+        day += timedelta(days=rng.randint(1, 10))
+        if day.year > 2025:
+            day = datetime.date(2023, 1, 1)
+    return rows[:count]
+
+
+def sheets(rows, size):
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def legacy_rows_group(sheet_rows):
+    out = []
+    for sheet in sheet_rows:
+        rows = []
+        for _, (mm, dd, yy), ship in sheet:
+            if mm.isdigit() and int(mm) > 12:
+                continue    # would have raised in strptime
+            rows.append({"date": legacy_row_date(mm, dd, yy, "2024"), "ship": ship})
+        out.append(legacy_group_by_ship(rows))
+    return out
+
+
+def new_rows_group(batch, sheet_rows):
+    out = []
+    for sheet in sheet_rows:
+        rows = []
+        for _, (mm, dd, yy), ship in sheet:
+            day = dates.row_date(mm, dd, yy, "2024")
+            if day is not None:
+                rows.append({"date": day, "ship": ship})
+        out.append(batch.group_by_ship(rows))
+    return out
+
+
+def cold(fn):
+    def run():
+        dates.parse_mdy.cache_clear()
+        dates.row_date.cache_clear()
+        return fn()
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--per-sheet", type=int, default=60, help="rows per grouped sheet")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    batch = load_batch_app()
+    rows = make_rows(args.rows, args.seed)
+    cells = [cell for cell, _, _ in rows]
+    sheet_rows = sheets(rows, args.per_sheet)
+    n = len(rows)
+
+    if [parse_date(c) for c in cells] != [legacy_parse_date(c) for c in cells]:
+        raise SystemExit("parse_date: result differs from strptime")
+    legacy = legacy_rows_group(sheet_rows)
+    new = [[{"ship": g["ship"], "start": dates.format_mdy(g["start"]),
+             "end": dates.format_mdy(g["end"])} for g in groups]
+           for groups in new_rows_group(batch, sheet_rows)]
+    if legacy != new:
+        raise SystemExit("rows+group: periods differ from strptime version")
+
+    print(f"{n} rows, {len(sheet_rows)} sheets, {len(set(cells))} distinct date cells")
+    cases = [
+        ("parse_date",
+         lambda: [legacy_parse_date(c) for c in cells],
+         lambda: [parse_date(c) for c in cells]),
+        ("rows+group",
+         lambda: legacy_rows_group(sheet_rows),
+         lambda: new_rows_group(batch, sheet_rows)),
+    ]
+    for name, old_fn, new_fn in cases:
+        t_old = best_of(old_fn, args.repeat)
+        t_cold = best_of(cold(new_fn), args.repeat)
+        t_warm = best_of(new_fn, args.repeat)
+        print(f"{name:11s} strptime {t_old * 1e6 / n:6.2f} us/row   "
+              f"cold {t_cold * 1e6 / n:6.2f} us/row ({t_old / t_cold:.1f}x)   "
+              f"warm {t_warm * 1e6 / n:6.2f} us/row ({t_old / t_warm:.1f}x)")
+    print("both variants agree on every row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Microbenchmark: app/ship_matcher.py, one extractOne per row (match_ship)
+vs. one cdist call per page (match_ships).
+
+Uses bench_ship_match's OCR corpus plus heavily mangled names, which
+score around the MIN_SCORE cutoff. Checks both paths resolve every row
+to the same ship, then reports the per-row cost with the memo cleared
+before each run.
+
+    python benchmarks/bench_match_ships.py [--rows 5000] [--page 40] [--seed 7]
+"""
+import argparse
+import random
+
+from _batch import best_of, load_batch_app
+from bench_ship_match import make_corpus, mangle
+
+from app import ship_matcher
+
+
+def near_cutoff(batch, n, seed):
+    """Names mangled three times over, with a junk word or two."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        name = rng.choice(batch.SHIP_LIST)
+        for _ in range(3):
+            name = mangle(name, rng)
+        rows.append(f"{name} {rng.choice(['PIER', 'ASW C', 'X', ''])}".strip())
+    return rows
+
+
+def cold(fn):
+    def run():
+        ship_matcher._memo.clear()
+        return fn()
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--page", type=int, default=40, help="rows per match_ships call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    batch = load_batch_app()
+    rows = make_corpus(batch, args.rows, args.seed) + near_cutoff(batch, args.rows, args.seed)
+    pages = [rows[i:i + args.page] for i in range(0, len(rows), args.page)]
+    n = len(rows)
+
+    def single():
+        return [ship_matcher.match_ship(r) for r in rows]
+
+    def bulk():
+        return [ship for page in pages for ship in ship_matcher.match_ships(page)]
+
+    expected = cold(single)()
+    got = cold(bulk)()
+    mismatches = [(r, e, g) for r, e, g in zip(rows, expected, got) if e != g]
+    for r, e, g in mismatches[:10]:
+        print(f"MISMATCH {r!r}: match_ship={e!r} match_ships={g!r}")
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} of {n} rows disagree")
+
+    t_single = best_of(cold(single), args.repeat)
+    t_bulk = best_of(cold(bulk), args.repeat)
+    print(f"corpus: {n} rows, match_ships calls of {args.page} rows")
+    print(f"match_ship  (extractOne): {t_single * 1e6 / n:7.1f} us/row")
+    print(f"match_ships (cdist)     : {t_bulk * 1e6 / n:7.1f} us/row "
+          f"({t_single / t_bulk:.1f}x)")
+    print("both paths agree on every row")
+
+
+if __name__ == "__main__":
+    main()
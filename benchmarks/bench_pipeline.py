@@ -0,0 +1,279 @@
+"""
+End-to-end stage benchmark over synthetic certification sheets.
+
+Generates seeded sheets (benchmarks/sheets.py) in a scratch directory and
+times each stage on its own:
+
+    extract              app.extractor.extract_sailors_and_events (web app)
+    ocr_parse_text       app.py ocr_pdf + parse_rows, text-layer sheets
+    ocr_parse_scanned    the same on image-only sheets (needs Tesseract)
+    group_by_ship        app.py group_by_ship over every parsed row
+    make_pdf             app.py make_pdf, one per ship period
+    make_pg13_pdf        app.generator.make_pg13_pdf, one per event
+    generate_pg13_zip    app.generator.generate_pg13_zip, one per sailor
+    merge_with_bookmarks app.py master packet over the make_pdf outputs
+
+Results go to a JSON file; pass an earlier one with --compare to flag
+stages that got slower.
+
+    python benchmarks/bench_pipeline.py --out bench.json
+    python benchmarks/bench_pipeline.py --compare bench.json --threshold 0.15
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from _batch import ROOT, load_batch_app
+import sheets
+
+# Keep per-run log lines out of the timings
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed(fn, repeat):
+    """Wall time of every run of fn(), plus its last return value."""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - t0)
+    return runs, result
+
+
+def stage_result(runs, items):
+    best = min(runs)
+    return {
+        "best": round(best, 6),
+        "median": round(statistics.median(runs), 6),
+        "runs": [round(r, 6) for r in runs],
+        "items": items,
+        "per_item_ms": round(best * 1000 / items, 4) if items else None,
+    }
+
+
+class Pipeline:
+    """Fixtures and the stage callables, sharing outputs between stages."""
+
+    def __init__(self, work, args):
+        self.args = args
+        self.work = work
+        self.batch = load_batch_app()
+
+        sailors = sheets.make_sailors(args.sailors, args.rows, args.seed)
+        self.sheet = os.path.join(work, "sheet.pdf")
+        self.pages = sheets.write_sheet(self.sheet, sailors)
+
+        self.data_dir = os.path.join(work, "data")
+        self.files = sheets.write_data_dir(self.data_dir, sailors)
+
+        self.scanned = []
+        if args.scanned:
+            scanned = sailors[:args.scanned]
+            self.scanned = sheets.write_data_dir(
+                os.path.join(work, "scanned"), scanned, scanned=True)
+
+        self.rates = self.batch.load_rates(
+            sheets.write_rates(os.path.join(work, "rates.csv"), sailors), _noop)
+        self.template = os.path.join(ROOT, "app", "templates_pdf",
+                                     "NAVPERS_1070_613_TEMPLATE.pdf")
+
+        self.extracted = None
+        self.parsed = None
+        self.groups = None
+
+    def extract(self):
+        from app.extractor import extract_sailors_and_events
+        self.extracted = extract_sailors_and_events(self.sheet)
+        return len(self.extracted)
+
+    def _ocr_parse(self, files, strategy):
+        from app.ocr import OcrEngine
+        parsed = []
+        with OcrEngine(workers=1, strategy=strategy, cache=None) as engine:
+            for path in files:
+                raw = self.batch.strip_times(self.batch.ocr_pdf(path, _noop, engine))
+                name = self.batch.extract_member_name(raw)
+                year = self.batch.extract_year_from_filename(path)
+                parsed.append((name, self.batch.parse_rows(raw, year)))
+        return parsed
+
+    def ocr_parse_text(self):
+        self.parsed = self._ocr_parse(self.files, "auto")
+        return len(self.files)
+
+    def ocr_parse_scanned(self):
+        self._ocr_parse(self.scanned, "ocr")
+        return len(self.scanned)
+
+    def group_by_ship(self):
+        self.groups = [(name, self.batch.group_by_ship(rows))
+                       for name, rows in self.parsed]
+        return sum(len(rows) for _, rows in self.parsed)
+
+    def make_pdf(self):
+        out = os.path.join(self.work, "out")
+        n = 0
+        for name, groups in self.groups:
+            rate = self.batch.get_rate(name, self.rates)
+            for g in groups:
+                self.batch.make_pdf(g, name, rate, self.template, out, _noop)
+                n += 1
+        return n
+
+    def make_pg13_pdf(self):
+        from app.generator import make_pg13_pdf
+        out = os.path.join(self.work, "pg13")
+        os.makedirs(out, exist_ok=True)
+        n = 0
+        for s in self.extracted:
+            for ship, start, end in s["events"]:
+                make_pg13_pdf(s["name"], ship, start, end, out)
+                n += 1
+        return n
+
+    def generate_pg13_zip(self):
+        from app.generator import generate_pg13_zip
+        out = os.path.join(self.work, "zips")
+        os.makedirs(out, exist_ok=True)
+        for s in self.extracted:
+            generate_pg13_zip(s, out)
+        return len(self.extracted)
+
+    def merge_with_bookmarks(self):
+        out = os.path.join(self.work, "out")
+        self.batch.merge_with_bookmarks(out, _noop, self.template)
+        return len([f for f in os.listdir(out)
+                    if f.lower().endswith(".pdf") and not f.startswith("MASTER")])
+
+
+STAGES = [
+    "extract", "ocr_parse_text", "ocr_parse_scanned", "group_by_ship",
+    "make_pdf", "make_pg13_pdf", "generate_pg13_zip", "merge_with_bookmarks",
+]
+
+
+def run(args):
+    from app.ocr import tesseract_version
+
+    work = tempfile.mkdtemp(prefix="seapay-bench-")
+    try:
+        pipe = Pipeline(work, args)
+        have_ocr = tesseract_version() != "none" and shutil.which("pdftoppm")
+
+        stages = {}
+        for name in STAGES:
+            if args.stages and name not in args.stages:
+                # Later stages still need the earlier ones' outputs
+                if name in ("extract", "ocr_parse_text", "group_by_ship", "make_pdf"):
+                    getattr(pipe, name)()
+                continue
+            if name == "ocr_parse_scanned" and not (pipe.scanned and have_ocr):
+                reason = "no scanned sheets" if not pipe.scanned else "Tesseract/poppler not installed"
+                stages[name] = {"skipped": reason}
+                print(f"{name:22s} skipped ({reason})")
+                continue
+
+            runs, items = timed(getattr(pipe, name), args.repeat)
+            stages[name] = stage_result(runs, items)
+            r = stages[name]
+            per = f"{r['per_item_ms']:9.3f} ms/item" if r["per_item_ms"] is not None else ""
+            print(f"{name:22s} best {r['best']:8.4f}s  median {r['median']:8.4f}s  "
+                  f"{items:5d} items {per}")
+
+        return {
+            "meta": {
+                "commit": git_commit(),
+                "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "params": {
+                    "sailors": args.sailors, "rows": args.rows,
+                    "scanned": args.scanned, "seed": args.seed,
+                    "repeat": args.repeat, "pages": pipe.pages,
+                },
+            },
+            "stages": stages,
+        }
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def compare(base, current, threshold):
+    """Print per-stage ratios; return the stages slower than threshold."""
+    if base["meta"].get("params") != current["meta"].get("params"):
+        print("warning: baseline was run with different parameters")
+
+    regressions = []
+    print(f"\n{'stage':22s} {'base':>9s} {'now':>9s} {'change':>8s}")
+    for name in STAGES:
+        old = base["stages"].get(name, {})
+        new = current["stages"].get(name, {})
+        if "best" not in old or "best" not in new:
+            continue
+        change = new["best"] / old["best"] - 1 if old["best"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:22s} {old['best']:9.4f} {new['best']:9.4f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sailors", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=30, help="table rows per sailor")
+    parser.add_argument("--scanned", type=int, default=2,
+                        help="sailors to also render as image-only sheets")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stages", nargs="*", choices=STAGES,
+                        help="only time these stages")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="slowdown (fraction) that counts as a regression")
+    args = parser.parse_args()
+
+    result = run(args)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        regressions = compare(base, result, args.threshold)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} stage(s) regressed: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
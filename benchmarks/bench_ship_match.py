@@ -0,0 +1,111 @@
+"""
+Microbenchmark: app.py match_ship, indexed matcher vs. the original
+n-gram x difflib scan.
+
+Builds a seeded corpus of OCR-style lines (dates, times, hull numbers,
+(ASW C) tags, dropped/swapped letters, junk words, lines with no ship),
+checks both matchers agree on every line, then times them.
+
+    python benchmarks/bench_ship_match.py [--lines 2000] [--seed 7]
+"""
+import argparse
+import random
+import string
+from difflib import get_close_matches
+
+from _batch import best_of, load_batch_app
+
+JUNK = ["UNDERWAY", "INPORT", "ASW", "C", "DEMOB", "TRANSIT", "PIER", "NAVSTA",
+        "SAN", "DIEGO", "TRNG", "LOG", "NR", "MITE", "CERT", "GRP"]
+
+
+def legacy_match_ship(batch, raw_text):
+    """match_ship as it was before the index: every window x every key."""
+    candidate = batch.normalize(raw_text)
+    if not candidate:
+        return None
+
+    words = candidate.split()
+    for size in range(len(words), 0, -1):
+        for i in range(len(words) - size + 1):
+            chunk = " ".join(words[i:i + size])
+            match = get_close_matches(chunk, batch.NORMAL_KEYS, n=1, cutoff=0.75)
+            if match:
+                return batch.NORMALIZED_SHIPS[match[0]]
+    return None
+
+
+def mangle(name, rng):
+    chars = list(name.upper())
+    for _ in range(rng.choice([0, 0, 1, 1, 2])):
+        i = rng.randrange(len(chars))
+        op = rng.choice(["drop", "swap", "sub"])
+        if op == "drop" and len(chars) > 3:
+            del chars[i]
+        elif op == "swap" and i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        else:
+            chars[i] = rng.choice(string.ascii_uppercase)
+    return "".join(chars)
+
+
+def make_corpus(batch, n, seed):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        date = f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/2024"
+        parts = [rng.choice(JUNK) for _ in range(rng.randint(0, 3))]
+        if rng.random() < 0.85:
+            parts.insert(rng.randint(0, len(parts)),
+                         "USS " + mangle(rng.choice(batch.SHIP_LIST), rng))
+        if rng.random() < 0.5:
+            parts.append(f"(DDG {rng.randint(50, 130)})")
+        parts.append(f"{rng.randint(0, 23):02d}00")
+        # parse_rows appends the following line to the candidate text
+        nxt = " ".join(rng.choice(JUNK) for _ in range(rng.randint(0, 4)))
+        lines.append(f"{date} {' '.join(parts)} {nxt}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    batch = load_batch_app()
+    corpus = make_corpus(batch, args.lines, args.seed)
+
+    expected = [legacy_match_ship(batch, line) for line in corpus]
+    got = [batch.match_ship(line) for line in corpus]
+    mismatches = [(line, e, g) for line, e, g in zip(corpus, expected, got) if e != g]
+    for line, e, g in mismatches[:10]:
+        print(f"MISMATCH {line!r}: legacy={e} indexed={g}")
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} of {len(corpus)} lines disagree")
+
+    def run_indexed():
+        batch.SHIP_INDEX.lookup.cache_clear()
+        for line in corpus:
+            batch.match_ship(line)
+
+    def run_legacy():
+        for line in corpus:
+            legacy_match_ship(batch, line)
+
+    legacy = best_of(run_legacy, args.repeat)
+    cold = best_of(run_indexed, args.repeat)
+    warm = best_of(lambda: [batch.match_ship(line) for line in corpus], args.repeat)
+
+    matched = sum(1 for e in expected if e)
+    print(f"corpus: {len(corpus)} lines, {matched} with a ship, all results identical")
+    print(f"legacy scan      : {legacy * 1e6 / len(corpus):9.1f} us/line")
+    print(f"index (cold memo): {cold * 1e6 / len(corpus):9.1f} us/line  "
+          f"({legacy / cold:.1f}x)")
+    print(f"index (warm memo): {warm * 1e6 / len(corpus):9.1f} us/line  "
+          f"({legacy / warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Cold-start benchmark: how long a fresh interpreter takes to get each app
+ready, and which heavy libraries that drags in.
+
+Every scenario runs in a new Python process (so nothing is already
+imported) and is repeated:
+
+    web_import      import app.web
+    web_health      app.web + first GET /health
+    batch_import    import app.py (the /data batch processor)
+    batch_form      app.py + first GET / (the form page)
+    warmup          app.warmup.warm_caches(), what gunicorn's master
+                    pays once before forking
+
+    python benchmarks/bench_startup.py [--repeat 5] [--out startup.json]
+    python benchmarks/bench_startup.py --budget 1.0   # fail if /health is slower
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from _batch import ROOT
+
+# Libraries a request path should only load when it needs them
+HEAVY = ("pdfplumber", "reportlab", "PyPDF2", "rapidfuzz", "pytesseract",
+         "pdf2image", "numpy")
+
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - t0
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+SCENARIOS = {
+    "web_import": "import app.web",
+    "web_health": (
+        "from app.web import app\n"
+        "assert app.test_client().get('/health').status_code == 200"
+    ),
+    "batch_import": (
+        "sys.path.insert(0, 'benchmarks')\n"
+        "from _batch import load_batch_app\n"
+        "load_batch_app()"
+    ),
+    "batch_form": (
+        "sys.path.insert(0, 'benchmarks')\n"
+        "from _batch import load_batch_app\n"
+        "assert load_batch_app().app.test_client().get('/').status_code == 200"
+    ),
+    "warmup": "from app.warmup import warm_caches\nwarm_caches()",
+}
+
+
+def run_child(body):
+    code = _CHILD.format(body=body, heavy=HEAVY)
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS),
+                        help="only run these scenarios")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--budget", type=float,
+                        help="fail if web_health's median exceeds this many seconds")
+    args = parser.parse_args()
+
+    results = {}
+    for name, body in SCENARIOS.items():
+        if args.scenarios and name not in args.scenarios:
+            continue
+        runs = [run_child(body) for _ in range(args.repeat)]
+        seconds = [r["seconds"] for r in runs]
+        results[name] = {
+            "best": round(min(seconds), 4),
+            "median": round(statistics.median(seconds), 4),
+            "heavy": runs[-1]["heavy"],
+        }
+        r = results[name]
+        print(f"{name:14s} best {r['best']:7.3f}s  median {r['median']:7.3f}s  "
+              f"loads: {', '.join(r['heavy']) or '-'}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "scenarios": results}, f, indent=2)
+        print(f"Wrote {args.out}")
+
+    if args.budget is not None and "web_health" in results:
+        median = results["web_health"]["median"]
+        if median > args.budget:
+            raise SystemExit(f"web_health took {median:.3f}s (budget {args.budget:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Microbenchmark: text cleaning, original per-call re.sub chains vs.
+app/textnorm.py's precompiled patterns and one-pass bulk functions.
+
+Cleans a seeded corpus of OCR lines / table cells with every variant,
+checks they agree on every row, then reports the per-row cost.
+
+    python benchmarks/bench_textnorm.py [--rows 5000] [--page 40] [--seed 7]
+"""
+import argparse
+import re
+
+from _batch import best_of, load_batch_app
+from bench_ship_match import make_corpus
+
+from app import textnorm
+
+
+# The cleaning helpers as they were before app/textnorm.py
+def legacy_normalize(text):
+    text = re.sub(r"\(.*?\)", "", text)
+    text = re.sub(r"[^A-Z ]", "", text.upper())
+    return " ".join(text.split())
+
+
+def legacy_clean_ship_name(raw):
+    if not raw:
+        return ""
+    r = raw
+    r = r.replace("þ", " ")
+    r = re.sub(r"\(.*?\)", " ", r)
+    r = re.sub(r"\bUSS\b", " ", r, flags=re.I)
+    r = re.sub(r"\b\d{3,4}\b", " ", r)
+    r = re.sub(r"[\d\-]", " ", r)
+    r = re.sub(r"\s+", " ", r)
+    return r.strip().upper()
+
+
+def legacy_clean_raw(raw):
+    cleaned = raw.upper()
+    cleaned = re.sub(r"\(.*?\)", " ", cleaned)
+    cleaned = re.sub(r"[^A-Z\s]", " ", cleaned)
+    return re.sub(r"\s+", " ", cleaned).strip()
+
+
+def legacy_strip_times(text):
+    return re.sub(r"\b[0-2]?\d[0-5]\d\b", "", text)
+
+
+VARIANTS = [
+    # name, legacy, per-row, bulk
+    ("normalize", legacy_normalize, textnorm.normalize, textnorm.normalize_all),
+    ("clean_ship_name", legacy_clean_ship_name, textnorm.clean_ship_name,
+     textnorm.clean_ship_names),
+    ("clean_raw", legacy_clean_raw, textnorm.clean_raw, textnorm.clean_raw_all),
+    ("strip_times", legacy_strip_times, textnorm.strip_times, None),
+]
+
+
+def pages(rows, size):
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--page", type=int, default=40, help="rows per bulk call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = make_corpus(load_batch_app(), args.rows, args.seed)
+    # Sprinkle in the table-cell quirks the extractor sees
+    corpus = [line.replace(" ", " þ ", 1) if i % 7 == 0 else line
+              for i, line in enumerate(corpus)]
+    batches = pages(corpus, args.page)
+    n = len(corpus)
+
+    print(f"corpus: {n} rows, bulk calls of {args.page} rows")
+    for name, legacy, single, bulk in VARIANTS:
+        expected = [legacy(r) for r in corpus]
+        if [single(r) for r in corpus] != expected:
+            raise SystemExit(f"{name}: per-row result differs from legacy")
+        if bulk and [c for b in batches for c in bulk(b)] != expected:
+            raise SystemExit(f"{name}: bulk result differs from legacy")
+
+        t_legacy = best_of(lambda: [legacy(r) for r in corpus], args.repeat)
+        t_single = best_of(lambda: [single(r) for r in corpus], args.repeat)
+        line = (f"{name:16s} legacy {t_legacy * 1e6 / n:6.2f} us/row   "
+                f"compiled {t_single * 1e6 / n:6.2f} us/row "
+                f"({t_legacy / t_single:.1f}x)")
+        if bulk:
+            t_bulk = best_of(lambda: [bulk(b) for b in batches], args.repeat)
+            line += (f"   bulk {t_bulk * 1e6 / n:6.2f} us/row "
+                     f"({t_legacy / t_bulk:.1f}x)")
+        print(line)
+    print("all variants agree on every row")
+
+
+if __name__ == "__main__":
+    main()
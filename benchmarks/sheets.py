@@ -0,0 +1,208 @@
+"""
+Synthetic SEA DUTY CERTIFICATION SHEET generator for the benchmarks.
+
+Every sheet is laid out once as a list of drawing ops (text and ruling
+lines in PDF points) and then rendered either as a normal PDF with a text
+layer or as a "scanned" PDF holding only a page image, so both variants
+carry exactly the same content.
+
+    python benchmarks/sheets.py out.pdf [--sailors 10] [--rows 25] [--scanned]
+"""
+import argparse
+import datetime
+import io
+import os
+import random
+
+from _batch import ROOT
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+FIRST = ["JOHN", "MARIA", "DAVID", "ASHLEY", "MICHAEL", "JESSICA", "CARLOS",
+         "EMILY", "JAMES", "SARAH", "ROBERT", "NICOLE", "DANIEL", "LAUREN"]
+LAST = ["SMITH", "JOHNSON", "GARCIA", "MILLER", "DAVIS", "RODRIGUEZ", "WILSON",
+        "MARTINEZ", "ANDERSON", "TAYLOR", "THOMAS", "MOORE", "JACKSON", "LEE",
+        "THOMPSON", "WHITE", "HARRIS", "CLARK", "LEWIS", "ROBINSON", "WALKER"]
+TAGS = ["", "", "", " (ASW C)", " (ASW T)", " (DEMOB)"]
+
+FONT_PATH = os.path.join(ROOT, "app", "fonts", "times.ttf")
+
+PAGE_W, PAGE_H = letter
+TOP = 700
+BOTTOM = 110
+ROW_H = 16
+COLS = (50, 130, 430, 530)      # DATE | SHIP | TIME
+
+
+def ship_names():
+    from app.ship_registry import get_registry
+    return [s.name for s in get_registry().ships]
+
+
+def make_sailors(count, rows, seed=7, year=2024):
+    """
+    Seeded sailors, each with rows dated events in underway periods of
+    consecutive days on one ship (what group_by_ship merges), a MITE row
+    now and then and the odd OCR-style tag or clock time.
+    """
+    rng = random.Random(seed)
+    ships = ship_names()
+    sailors = []
+    for _ in range(count):
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+        day = datetime.date(year, 1, 1) + datetime.timedelta(days=rng.randrange(30))
+        events = []
+        while len(events) < rows:
+            ship = rng.choice(ships).upper()
+            for _ in range(min(rng.randint(2, 8), rows - len(events))):
+                if rng.random() < 0.04:
+                    cell = "MITE TRAINING"
+                else:
+                    cell = f"USS {ship}{rng.choice(TAGS)}"
+                events.append((day, cell, f"{rng.choice([8, 12, 16]):02d}00"))
+                day += datetime.timedelta(days=1)
+            day += datetime.timedelta(days=rng.randint(1, 10))
+        sailors.append({"name": name, "events": events})
+    return sailors
+
+
+def layout(sailors):
+    """Pages of drawing ops: ("text", x, y, size, s) / ("line", x0, y0, x1, y1)."""
+    pages = []
+    for s in sailors:
+        events = list(s["events"])
+        page_no = 0
+        while True:
+            ops = [("text", 50, 750, 14, "SEA DUTY CERTIFICATION SHEET")]
+            if page_no == 0:
+                ops.append(("text", 50, 728, 11,
+                            f"Name: {s['name']} SSN XXX-XX-{1000 + len(pages) % 9000}"))
+            y = TOP
+            chunk = []
+            while events and y - ROW_H * (len(chunk) + 2) > BOTTOM:
+                chunk.append(events.pop(0))
+            table = [("DATE", "SHIP", "TIME")] + [
+                (f"{d.month}/{d.day}/{d.year}", cell, t) for d, cell, t in chunk
+            ]
+            bottom = y - ROW_H * len(table)
+            for x in COLS:
+                ops.append(("line", x, y, x, bottom))
+            for r, cells in enumerate(table):
+                row_top = y - ROW_H * r
+                ops.append(("line", COLS[0], row_top, COLS[-1], row_top))
+                for x, text in zip(COLS, cells):
+                    ops.append(("text", x + 4, row_top - 12, 10, text))
+            ops.append(("line", COLS[0], bottom, COLS[-1], bottom))
+            if not events:
+                ops.append(("text", 50, 80, 10,
+                            "CERTIFYING OFFICER SIGNATURE ____________________"))
+            pages.append(ops)
+            page_no += 1
+            if not events:
+                break
+    return pages
+
+
+def render_text(pages, path):
+    """PDF with a real text layer and vector ruling lines."""
+    c = canvas.Canvas(path, pagesize=letter)
+    for ops in pages:
+        for op in ops:
+            if op[0] == "text":
+                _, x, y, size, s = op
+                c.setFont("Times-Roman", size)
+                c.drawString(x, y, s)
+            else:
+                c.line(*op[1:])
+        c.showPage()
+    c.save()
+
+
+def render_scanned(pages, path, dpi=150, seed=7):
+    """
+    Image-only PDF, as a scanner would produce: each page drawn into a
+    grayscale bitmap (slightly skewed and speckled) with no text layer.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    rng = random.Random(seed)
+    scale = dpi / 72.0
+    w, h = int(PAGE_W * scale), int(PAGE_H * scale)
+    fonts = {}
+
+    c = canvas.Canvas(path, pagesize=letter)
+    for ops in pages:
+        img = Image.new("L", (w, h), 255)
+        draw = ImageDraw.Draw(img)
+        for op in ops:
+            if op[0] == "text":
+                _, x, y, size, s = op
+                if size not in fonts:
+                    fonts[size] = ImageFont.truetype(FONT_PATH, int(size * scale))
+                draw.text((x * scale, (PAGE_H - y - size * 0.8) * scale), s,
+                          fill=0, font=fonts[size])
+            else:
+                x0, y0, x1, y1 = op[1:]
+                draw.line((x0 * scale, (PAGE_H - y0) * scale,
+                           x1 * scale, (PAGE_H - y1) * scale), fill=0, width=2)
+        for _ in range(w * h // 4000):
+            img.putpixel((rng.randrange(w), rng.randrange(h)), rng.randrange(96, 200))
+        img = img.rotate(rng.uniform(-0.6, 0.6), fillcolor=255)
+
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        c.drawImage(ImageReader(buf), 0, 0, PAGE_W, PAGE_H)
+        c.showPage()
+    c.save()
+
+
+def write_sheet(path, sailors, scanned=False):
+    pages = layout(sailors)
+    if scanned:
+        render_scanned(pages, path)
+    else:
+        render_text(pages, path)
+    return len(pages)
+
+
+def write_data_dir(data_dir, sailors, year=2024, scanned=False):
+    """One sheet per sailor, named like the batch processor's /data inputs."""
+    os.makedirs(data_dir, exist_ok=True)
+    paths = []
+    for i, s in enumerate(sailors):
+        last = s["name"].split(" ", 1)[1]
+        path = os.path.join(data_dir, f"{last}_{i:03d}_{year}.pdf")
+        write_sheet(path, [s], scanned)
+        paths.append(path)
+    return paths
+
+
+def write_rates(path, sailors, rates=("BM2", "GM1", "ET2", "OS3", "FC1")):
+    """Rate CSV (last,first,rate) for the batch processor."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("last,first,rate\n")
+        for i, s in enumerate(sailors):
+            first, last = s["name"].split(" ", 1)
+            f.write(f"{last},{first},{rates[i % len(rates)]}\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument("--sailors", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--scanned", action="store_true")
+    args = parser.parse_args()
+
+    sailors = make_sailors(args.sailors, args.rows, args.seed)
+    pages = write_sheet(args.path, sailors, args.scanned)
+    kind = "scanned" if args.scanned else "text-layer"
+    print(f"Wrote {args.path}: {kind}, {len(sailors)} sailors, {pages} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Production server settings (gunicorn reads this file with -c).
+
+Workers are forked from a master that has already imported the app and
+warmed its caches (preload_app + app.warmup), so the heavy PDF/OCR
+imports, the TTF font, the ship index and the parsed templates are
+loaded once and shared copy-on-write.
+
+Every setting can be overridden from the environment:
+
+    WSGI_APP          app to serve (wsgi:app = batch processor, app.web:app)
+    PORT              listen port (8080)
+    WEB_WORKERS       worker processes
+    PG13_WORKERS      PG-13 generation processes per app.web worker
+    WEB_WORKER_CLASS  gthread (default), sync, or gevent if installed
+    WEB_THREADS       request threads per worker
+    WEB_TIMEOUT       seconds a worker may go silent before it is restarted
+"""
+import os
+
+from app.config import WEB_WORKERS, env_int
+
+
+wsgi_app = os.environ.get("WSGI_APP", "wsgi:app")
+bind = f"0.0.0.0:{env_int('PORT', 8080)}"
+
+# The batch processor keeps its job queue and job status in process
+# memory, so it runs as one process and scales with threads (the batch
+# work itself already fans out over the OCR process pool). The upload
+# app is stateless but each worker has its own PG-13 process pool, so it
+# gets a few workers (app.config.WEB_WORKERS, at most 2 by default) and
+# PG13_WORKERS defaults to the cores divided between them; set both to
+# trade request processes against generation processes.
+STATEFUL_APPS = ("wsgi:app",)
+if wsgi_app in STATEFUL_APPS:
+    workers = env_int("WEB_WORKERS", 1)
+else:
+    workers = WEB_WORKERS
+
+# Threaded workers: a slow OCR upload or an open /jobs/<id>/events stream
+# holds one thread, not the whole worker, so /health and other users
+# are still served
+worker_class = os.environ.get("WEB_WORKER_CLASS", "gthread")
+threads = env_int("WEB_THREADS", 8)
+
+# gthread workers heartbeat from their main loop, so long requests do not
+# trip this; it only catches a wedged worker
+timeout = env_int("WEB_TIMEOUT", 120)
+graceful_timeout = 30
+keepalive = 5
+
+preload_app = True
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    # Runs in the master after the preloaded app is imported, before any
+    # worker is forked
+    import sys
+
+    from app.config import PG13_TEMPLATE_PATH
+    from app.loader import BATCH_MODULE
+    from app.warmup import warm_caches
+
+    templates = [PG13_TEMPLATE_PATH]
+    batch = sys.modules.get(BATCH_MODULE)
+    if batch is not None:
+        templates.append(batch.DEFAULT_TEMPLATE_PDF)
+    warm_caches(templates)
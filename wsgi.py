@@ -0,0 +1,12 @@
+"""
+WSGI entry point for the /data batch processor (app.py), for gunicorn:
+
+    gunicorn -c gunicorn.conf.py              # batch processor (wsgi:app)
+    WSGI_APP=app.web:app gunicorn -c gunicorn.conf.py   # upload web app
+
+app.py is shadowed by the app/ package on sys.path, so app.loader loads
+it by file path under its own module name.
+"""
+from app.loader import load_batch_app
+
+app = load_batch_app().app